@@ -0,0 +1,409 @@
+"""
+In-process load benchmark for the API.
+
+Drives the FastAPI app from main.py through httpx's ASGI transport (inside
+the app lifespan) against local stand-ins:
+  - S3: moto, in process
+  - MongoDB: mongomock-motor, or a local mongod with --mongo-uri
+  - SMTP: an aiosmtpd sink on a free local port
+
+A seeded dataset (assets, a verified user) is loaded first, then each
+scenario is run for a fixed number of requests at a fixed concurrency.
+Throughput, p50/p95/p99/mean latency and errors are reported per scenario,
+with the process's peak RSS, and can be saved as JSON and compared.
+
+mongomock sorts and filters in Python, so listing numbers at 100k assets
+reflect the stand-in; use --mongo-uri mongodb://localhost:27017 for
+database-bound comparisons.
+
+Extra dependencies: pip install -r benchmarks/requirements.txt
+
+Run from the repository root:
+    python -m benchmarks.load run --assets 10000 --output before.json
+    python -m benchmarks.load run --assets 10000 --output after.json
+    python -m benchmarks.load compare before.json after.json --threshold 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import socket
+import struct
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_BUCKET = "xplor-bench"
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+TAGS = ["chair", "table", "lamp", "sofa", "bed", "plant", "car", "tree", "rock", "door"]
+
+RATE_LIMITED_ROUTES = ("LOGIN", "REGISTER", "FORGOT_PASSWORD", "VERIFY_EMAIL", "RESET_PASSWORD")
+
+# Latency metrics where an increase is a regression; throughput is the inverse
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def parse_size(value: str) -> int:
+    units = {"KB": 1024, "MB": 1024 * 1024}
+    value = value.strip().upper()
+    for unit, factor in units.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * factor)
+    return int(value)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def configure_environment(args):
+    """Settings are read at import, so the stand-ins are configured before main is imported."""
+    os.environ.update(
+        AWS_ACCESS_KEY_ID="bench",
+        AWS_SECRET_ACCESS_KEY="bench",
+        AWS_REGION="us-east-1",
+        S3_BUCKET_NAME=BENCH_BUCKET,
+        MONGO_DB_NAME="xplor_bench",
+        SMTP_SERVER="127.0.0.1",
+        SMTP_PORT=str(args.smtp_port),
+        SMTP_STARTTLS="false",
+        SMTP_AUTH="false",
+        BCRYPT_ROUNDS=str(args.bcrypt_rounds),
+        HEALTH_CHECK_INTERVAL_SECONDS="60",
+    )
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+    # Benchmarks measure handler cost, not throttling
+    for route in RATE_LIMITED_ROUTES:
+        os.environ[f"RATE_LIMIT_{route}_IP"] = ""
+        os.environ[f"RATE_LIMIT_{route}_EMAIL"] = ""
+
+
+def make_glb(rng: random.Random, size: int) -> bytes:
+    """A valid GLB of roughly `size` bytes: one mesh whose positions fill the BIN chunk."""
+    vertices = max(3, (size - 1024) // 12)
+    positions = struct.pack("<3f", 0.0, 1.0, 2.0) * vertices
+    # Vary a few bytes so repeated uploads are not deduplicated by content hash
+    positions = rng.randbytes(12) + positions[12:]
+    gltf = {
+        "asset": {"version": "2.0"},
+        "buffers": [{"byteLength": len(positions)}],
+        "bufferViews": [{"buffer": 0, "byteOffset": 0, "byteLength": len(positions)}],
+        "accessors": [{
+            "bufferView": 0, "componentType": 5126, "count": vertices, "type": "VEC3",
+            "min": [-1.0, -1.0, -1.0], "max": [1.0, 1.0, 1.0],
+        }],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}}]}],
+        "nodes": [{"mesh": 0}],
+    }
+    json_chunk = json.dumps(gltf).encode()
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    total = 12 + 8 + len(json_chunk) + 8 + len(positions)
+    return (
+        struct.pack("<4sII", b"glTF", 2, total)
+        + struct.pack("<II", len(json_chunk), 0x4E4F534A) + json_chunk
+        + struct.pack("<II", len(positions), 0x004E4942) + positions
+    )
+
+
+def seeded_uuid(rng: random.Random) -> str:
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+async def seed(rng: random.Random, asset_count: int):
+    """Loads assets and a verified user directly through the repositories."""
+    from repositories.asset_repository import asset_repository
+    from repositories.user_repository import user_repository
+    from models.user_model import UserInDB
+    from utils.security import get_password_hash
+
+    now = datetime.utcnow()
+    file_ids = []
+    batch = []
+    for i in range(asset_count):
+        file_id = seeded_uuid(rng)
+        key = f"assets/models/{file_id}_model_{i}.glb"
+        vertices = rng.randint(100, 500_000)
+        batch.append({
+            "file_id": file_id,
+            "file_name": f"model_{i}.glb",
+            "model_url": f"https://{BENCH_BUCKET}.s3.us-east-1.amazonaws.com/{key}",
+            "model_key": key,
+            "thumbnail_url": None,
+            "thumbnail_key": None,
+            "uploaded_at": now - timedelta(seconds=i),
+            "uploaded_by": rng.choice(["Ananya", "Ravi", "Meera"]),
+            "name": f"{rng.choice(TAGS).title()} {i}",
+            "tags": rng.sample(TAGS, 3),
+            "geometry": {"vertex_count": vertices, "triangle_count": vertices // 2},
+        })
+        file_ids.append(file_id)
+        if len(batch) == 1000:
+            await asset_repository.insert_many(batch)
+            batch = []
+    if batch:
+        await asset_repository.insert_many(batch)
+
+    await user_repository.create(UserInDB(
+        email=BENCH_EMAIL,
+        full_name="Benchmark User",
+        hashed_password=await get_password_hash(BENCH_PASSWORD),
+        is_verified=True,
+    ).model_dump())
+    return file_ids
+
+
+def build_scenarios(args, rng, file_ids, token):
+    """Each scenario maps to a factory returning the kwargs of one request."""
+    auth = {"Authorization": f"Bearer {token}"}
+    counter = iter(range(10 ** 9))
+    scenarios = {
+        "list_assets": lambda: {"method": "GET", "url": "/assets/", "params": {"limit": 50}},
+        "list_assets_500": lambda: {"method": "GET", "url": "/assets/", "params": {"limit": 500}},
+        "list_assets_etag": None,  # filled in after a warm-up request
+        "get_asset": lambda: {"method": "GET", "url": f"/assets/{rng.choice(file_ids)}"},
+        "search_by_tags": lambda: {
+            "method": "GET", "url": "/assets/search",
+            "params": {"tags": rng.sample(TAGS, 1), "limit": 50},
+        },
+        "login": lambda: {
+            "method": "POST", "url": "/auth/login",
+            "data": {"username": BENCH_EMAIL, "password": BENCH_PASSWORD},
+        },
+        "get_current_user": lambda: {"method": "GET", "url": "/auth/me", "headers": auth},
+        "register": lambda: {
+            "method": "POST", "url": "/auth/register",
+            "json": {"email": f"user{next(counter)}@example.com", "password": BENCH_PASSWORD},
+        },
+    }
+    for size_label in args.glb_sizes.split(","):
+        size = parse_size(size_label)
+        scenarios[f"upload_asset_{size_label.strip()}"] = lambda size=size: {
+            "method": "POST", "url": "/assets/upload/",
+            "files": {"file": ("bench.glb", make_glb(rng, size), "model/gltf-binary")},
+        }
+    return scenarios
+
+
+async def run_scenario(client, factory, requests, concurrency):
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            kwargs = factory()
+            start = time.perf_counter()
+            response = await client.request(**kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / wall, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(50), 3),
+        "p95_ms": round(percentile(95), 3),
+        "p99_ms": round(percentile(99), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+async def run(args):
+    configure_environment(args)
+
+    from aiosmtpd.controller import Controller
+    from moto import mock_aws
+    import boto3
+    import httpx
+
+    class MailSink:
+        received = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            MailSink.received += 1
+            return "250 OK"
+
+    smtp = Controller(MailSink(), hostname="127.0.0.1", port=args.smtp_port)
+    smtp.start()
+    aws = mock_aws()
+    aws.start()
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BENCH_BUCKET)
+
+    if not args.mongo_uri:
+        from tests.support import install_mongomock
+        install_mongomock()
+
+    from main import app
+
+    # Per-request INFO logs would dominate the measurements
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logging.getLogger("mail.log").setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    results = {}
+    try:
+        async with app.router.lifespan_context(app):
+            if args.mongo_uri:
+                from core import database
+                await database.client.drop_database(os.environ["MONGO_DB_NAME"])
+                await database.ensure_indexes()
+
+            started = time.perf_counter()
+            file_ids = await seed(rng, args.assets)
+            print(f"Seeded {args.assets} assets in {time.perf_counter() - started:.1f}s")
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                token = (await client.post(
+                    "/auth/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+                )).json()["access_token"]
+                scenarios = build_scenarios(args, rng, file_ids, token)
+                etag = (await client.get("/assets/", params={"limit": 50})).headers.get("etag")
+                scenarios["list_assets_etag"] = lambda: {
+                    "method": "GET", "url": "/assets/", "params": {"limit": 50},
+                    "headers": {"If-None-Match": etag},
+                }
+
+                selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+                for name in selected:
+                    requests = args.requests
+                    if name.startswith(("upload_asset", "login", "register")):
+                        requests = max(1, requests // 10)
+                    result = await run_scenario(client, scenarios[name], requests, args.concurrency)
+                    results[name] = result
+                    print(
+                        f"{name:<24} {result['throughput_rps']:>9.1f} req/s  "
+                        f"p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+                        f"p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}"
+                    )
+    finally:
+        aws.stop()
+        smtp.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "assets": args.assets,
+            "concurrency": args.concurrency,
+            "mongo": args.mongo_uri or "mongomock",
+            "mail_received": MailSink.received,
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "results": results,
+    }
+    print(f"Peak RSS {report['peak_rss_mb']} MB")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    threshold = args.threshold / 100
+    regressions = []
+    print(f"{'scenario':<24} {'metric':<15} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for name, base in baseline["results"].items():
+        new = candidate["results"].get(name)
+        if new is None:
+            continue
+        for metric in LATENCY_METRICS + ("throughput_rps",):
+            before, after = base[metric], new[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            # Higher latency or lower throughput is worse
+            worse = change > threshold if metric in LATENCY_METRICS else change < -threshold
+            flag = "  REGRESSION" if worse else ""
+            if worse:
+                regressions.append((name, metric))
+            print(f"{name:<24} {metric:<15} {before:>10.2f} {after:>10.2f} {change:>+7.1%}{flag}")
+
+    rss_change = (candidate["peak_rss_mb"] - baseline["peak_rss_mb"]) / baseline["peak_rss_mb"]
+    print(f"{'peak RSS':<40} {baseline['peak_rss_mb']:>10.1f} {candidate['peak_rss_mb']:>10.1f} {rss_change:>+7.1%}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold}%")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+def main():
+    sys.path.insert(0, ROOT)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the scenarios and report latency")
+    run_parser.add_argument("--assets", type=int, default=1000, help="Seeded assets (1k-100k)")
+    run_parser.add_argument("--requests", type=int, default=500, help="Requests per read scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--glb-sizes", default="64KB,1MB,8MB")
+    run_parser.add_argument("--scenarios", help="Comma-separated subset to run")
+    run_parser.add_argument("--seed", type=int, default=1234)
+    run_parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    run_parser.add_argument("--mongo-uri", help="Use a local mongod instead of mongomock")
+    run_parser.add_argument("--smtp-port", type=int, default=None)
+    run_parser.add_argument("--output", help="Write the report to this JSON file")
+    run_parser.add_argument("--verbose", action="store_true", help="Keep the app's INFO logs")
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="Allowed change in percent")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        args.smtp_port = args.smtp_port or free_port()
+        asyncio.run(run(args))
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
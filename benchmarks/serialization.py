@@ -0,0 +1,104 @@
+"""
+Microbenchmark for the asset listing response path.
+
+Compares FastAPI's generic path (jsonable_encoder + JSONResponse), the
+response_model path (AssetResponse validation + encoding) and the orjson
+FastJSONResponse used by the routes, on a synthetic page of assets.
+
+Run from the repository root:
+    python -m benchmarks.serialization [--assets 10000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from models.asset_model import AssetResponse
+from utils.responses import FastJSONResponse
+
+
+def make_assets(count):
+    now = datetime.utcnow()
+    assets = []
+    for i in range(count):
+        file_id = str(uuid4())
+        key = f"assets/models/{file_id}_chair_{i}.glb"
+        assets.append({
+            "file_id": file_id,
+            "name": f"Chair {i}",
+            "file_name": f"chair_{i}.glb",
+            "model_url": f"https://bucket.s3.ap-south-1.amazonaws.com/{key}",
+            "model_key": key,
+            "thumbnail_url": f"https://bucket.s3.ap-south-1.amazonaws.com/assets/previews/{file_id}_t.png",
+            "thumbnail_key": f"assets/previews/{file_id}_t.png",
+            "uploaded_by": "Ananya",
+            "uploaded_at": now - timedelta(seconds=i),
+            "updated_at": now - timedelta(seconds=i),
+            "version": 1,
+            "tags": ["furniture", "chair", f"set-{i % 20}"],
+            "content_hash": "0" * 64,
+            "geometry": {
+                "mesh_count": 3, "primitive_count": 5, "material_count": 2,
+                "texture_count": 1, "image_count": 1, "node_count": 4,
+                "animation_count": 0, "vertex_count": 1200 + i, "triangle_count": 800 + i,
+                "bounds": {"min": [-1.0, 0.0, -1.0], "max": [1.0, 2.0, 1.0]},
+                "file_size": 48213, "json_size": 2120, "bin_size": 46000,
+                "embedded_textures": [], "embedded_texture_bytes": 0,
+            },
+            "thumbnail_content_type": "image/png",
+            "previews": [],
+        })
+    return assets
+
+
+def generic_path(payload):
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def response_model_path(payload, adapter):
+    assets = adapter.validate_python(payload["assets"])
+    return JSONResponse(jsonable_encoder({**payload, "assets": assets})).body
+
+
+def fast_path(payload):
+    return FastJSONResponse(payload).body
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), min(samples), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assets", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    assets = make_assets(args.assets)
+    payload = {"total": len(assets), "count": len(assets), "next_cursor": None, "assets": assets}
+    adapter = TypeAdapter(list[AssetResponse])
+
+    results = {
+        "jsonable_encoder": timed(lambda: generic_path(payload), args.repeat),
+        "response_model": timed(lambda: response_model_path(payload, adapter), args.repeat),
+        "orjson": timed(lambda: fast_path(payload), args.repeat),
+    }
+    baseline = results["jsonable_encoder"][0]
+    print(f"{args.assets} assets, median of {args.repeat} runs")
+    for name, (median, best, size) in results.items():
+        print(f"  {name:<18} {median * 1000:9.1f} ms  (best {best * 1000:.1f} ms, "
+              f"{size / 1024:.0f} KiB, {baseline / median:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
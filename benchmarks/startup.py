@@ -0,0 +1,77 @@
+"""
+Cold-start report for the API.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and
+lists the slowest imports by cumulative time, then (with --lifespan) runs
+the app lifespan once and prints the per-phase startup timings. The
+lifespan phase needs the configured MongoDB and S3 to be reachable.
+
+Run from the repository root:
+    python -m benchmarks.startup [--top 25] [--lifespan]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times():
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Nested imports are indented by two spaces per level
+        rows.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+    return wall, rows
+
+
+def report_imports(top):
+    wall, rows = import_times()
+    # Top-level packages only appear once at indentation depth zero
+    roots = [row for row in rows if not row[2].startswith(" ")]
+    total = sum(cumulative for cumulative, _, _ in roots)
+    print(f"import main: {total / 1e6:.3f}s of imports ({wall:.3f}s wall incl. interpreter)")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:10.1f}ms {self_us / 1000:8.1f}ms  {name}")
+
+
+async def report_lifespan():
+    sys.path.insert(0, ROOT)
+    from main import app
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter() - start
+        print(f"\nlifespan ready in {ready:.3f}s")
+        for phase, seconds in app.state.startup_timings.items():
+            print(f"  {phase:<20} {seconds * 1000:9.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--lifespan", action="store_true", help="Also time the startup phases")
+    args = parser.parse_args()
+
+    report_imports(args.top)
+    if args.lifespan:
+        asyncio.run(report_lifespan())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,51 @@
-import boto3
 import logging
+import os
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
-try:
-    logger.info("Initializing AWS S3 client...")
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_KEY,
-        region_name=settings.AWS_REGION,
-    )
-    logger.info("AWS S3 client initialized successfully.")
-except Exception as e:
-    logger.error(f"Failed to initialize AWS S3 client: {e}")
-    s3 = None
+# Created per worker process by the app lifespan (see core/lifespan.py)
+s3 = None
+_client_pid = None
+
+
+def connect():
+    global s3, _client_pid
+    if s3 is not None and _client_pid == os.getpid():
+        return
+    try:
+        logger.info("Initializing AWS S3 client...")
+        import boto3  # loading botocore's service models is the slow part
+
+        s3 = boto3.client(
+            "s3",
+            aws_access_key_id=settings.AWS_ACCESS_KEY,
+            aws_secret_access_key=settings.AWS_SECRET_KEY,
+            region_name=settings.AWS_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+        )
+        if settings.METRICS_ENABLED:
+            from utils.metrics import instrument_s3
+            instrument_s3(s3)
+        _client_pid = os.getpid()
+        logger.info("AWS S3 client initialized successfully.")
+    except Exception as e:
+        logger.error("Failed to initialize AWS S3 client: %s", e)
+        s3 = None
 
+
+def warm_up():
+    """Blocking: opens a pooled HTTPS connection to the bucket endpoint."""
+    if s3 is None:
+        return
+    try:
+        s3.head_bucket(Bucket=settings.S3_BUCKET)
+    except Exception as e:
+        logger.warning("S3 warm-up failed: %s", e)
+
+
+def close():
+    global s3
+    if s3 is not None:
+        s3.close()
+    s3 = None
@@ -8,15 +8,106 @@ class Settings:
     AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
     AWS_REGION = os.getenv("AWS_REGION")
     S3_BUCKET = os.getenv("S3_BUCKET_NAME")
+    # Optional custom endpoint, e.g. a local moto server or MinIO for testing
+    S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+    PRESIGNED_URL_EXPIRE_SECONDS = int(os.getenv("PRESIGNED_URL_EXPIRE_SECONDS", 3600))
+    # Download proxy: streamed chunk size and how long presigned redirects are reused
+    DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 1024 * 1024))
+    DOWNLOAD_REDIRECT_CACHE_SECONDS = float(os.getenv("DOWNLOAD_REDIRECT_CACHE_SECONDS", 300))
+    # S3 transfer tuning (parts must be at least 5 MB, except the last one)
+    S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", 8 * 1024 * 1024))
+    S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", 4))
+
+    # Upload inspection
+    GLB_MAX_JSON_BYTES = int(os.getenv("GLB_MAX_JSON_BYTES", 16 * 1024 * 1024))
 
     MONGO_URI = os.getenv("MONGO_URI")
     MONGO_DB_NAME = os.getenv("MONGO_DB_NAME")
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 20000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000))
+
+    # Caching ("memory" is per worker; "redis" is shared between workers)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    ASSET_CACHE_TTL_SECONDS = float(os.getenv("ASSET_CACHE_TTL_SECONDS", 60))
+    ASSET_CACHE_MAX_ENTRIES = int(os.getenv("ASSET_CACHE_MAX_ENTRIES", 10000))
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+
+    # Asset listing
+    DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 50))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+    BULK_DELETE_MAX_ASSETS = int(os.getenv("BULK_DELETE_MAX_ASSETS", 10000))
+
+    # Thumbnail previews (resized in a background process pool)
+    PREVIEW_SIZES = [int(size) for size in os.getenv("PREVIEW_SIZES", "128,256,512").split(",")]
+    PREVIEW_FORMATS = os.getenv("PREVIEW_FORMATS", "webp,jpeg").split(",")
+    PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", 2))
+    PREVIEW_PROCESSES = int(os.getenv("PREVIEW_PROCESSES", 2))
+    PREVIEW_MAX_ATTEMPTS = int(os.getenv("PREVIEW_MAX_ATTEMPTS", 3))
+    JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", 7))
+
+    # Batch upload
+    BATCH_UPLOAD_MAX_FILES = int(os.getenv("BATCH_UPLOAD_MAX_FILES", 50))
+    BATCH_UPLOAD_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", 4))
+
+    # Idempotency-Key on POST /assets/upload/: how long responses are kept,
+    # how long an in-progress claim holds before another request may take it
+    # over (longer than the slowest upload), and how long a retry waits
+    IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", 24 * 3600))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 900))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 60))
 
     # Security
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here") # Change in production
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+    # Password hashing: bcrypt cost and the bounded pool it runs on
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+    OTP_EXPIRE_MINUTES = int(os.getenv("OTP_EXPIRE_MINUTES", 10))
+
+    # Readiness: background dependency checks served from memory
+    HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", 5))
+    HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", 2))
+
+    # Metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("METRICS_LOOP_LAG_INTERVAL_SECONDS", 0.5))
+
+    # Logging: records are queued and written by a background thread
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json or text
+    LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", 10000))
+    # Share of requests whose INFO logs from the loggers below are kept
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.1))
+    LOG_SAMPLED_LOGGERS = os.getenv("LOG_SAMPLED_LOGGERS", "uvicorn.access,routes.assets").split(",")
+    REQUEST_ID_HEADER = os.getenv("REQUEST_ID_HEADER", "X-Request-ID")
+
+    # Rate limiting: token buckets as "<requests>/<seconds>"; empty disables
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", CACHE_REDIS_URL)
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+    TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() == "true"
+    # Proxies in front of the app that append to X-Forwarded-For
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 1))
+    RATE_LIMIT_LOGIN_IP = os.getenv("RATE_LIMIT_LOGIN_IP", "20/60")
+    RATE_LIMIT_LOGIN_EMAIL = os.getenv("RATE_LIMIT_LOGIN_EMAIL", "5/60")
+    RATE_LIMIT_REGISTER_IP = os.getenv("RATE_LIMIT_REGISTER_IP", "5/60")
+    RATE_LIMIT_REGISTER_EMAIL = os.getenv("RATE_LIMIT_REGISTER_EMAIL", "3/600")
+    RATE_LIMIT_FORGOT_PASSWORD_IP = os.getenv("RATE_LIMIT_FORGOT_PASSWORD_IP", "5/60")
+    RATE_LIMIT_FORGOT_PASSWORD_EMAIL = os.getenv("RATE_LIMIT_FORGOT_PASSWORD_EMAIL", "3/600")
+    RATE_LIMIT_VERIFY_EMAIL_IP = os.getenv("RATE_LIMIT_VERIFY_EMAIL_IP", "10/60")
+    RATE_LIMIT_VERIFY_EMAIL_EMAIL = os.getenv("RATE_LIMIT_VERIFY_EMAIL_EMAIL", "5/600")
+    RATE_LIMIT_RESET_PASSWORD_IP = os.getenv("RATE_LIMIT_RESET_PASSWORD_IP", "10/60")
+    RATE_LIMIT_RESET_PASSWORD_EMAIL = os.getenv("RATE_LIMIT_RESET_PASSWORD_EMAIL", "5/600")
+
     # OAuth - Google
     GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
@@ -28,5 +119,16 @@ class Settings:
     SMTP_USERNAME = os.getenv("SMTP_USERNAME")
     SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
     SMTP_FROM_EMAIL = os.getenv("SMTP_FROM_EMAIL", "noreply@xplor.com")
+    SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_VALIDATE_CERTS = os.getenv("SMTP_VALIDATE_CERTS", "false").lower() == "true"
+    # Set to false for relays that accept mail without login (e.g. a local aiosmtpd)
+    SMTP_AUTH = os.getenv("SMTP_AUTH", "true").lower() == "true"
+    SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", 10))
+    SMTP_IDLE_TIMEOUT_SECONDS = float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", 60))
+
+    # Outbound mail queue
+    MAIL_QUEUE_MAX_SIZE = int(os.getenv("MAIL_QUEUE_MAX_SIZE", 1000))
+    MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 20))
+    MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
 
 settings = Settings()
@@ -1,29 +1,134 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, ASCENDING, DESCENDING, TEXT
 import certifi
 import logging
+import os
 from core.config import settings
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-try:
-    logger.info("Connecting to MongoDB...")
-    client = MongoClient(settings.MONGO_URI, tlsCAFile=certifi.where())
-    db = client[settings.MONGO_DB_NAME]
-    assets_collection = db["assets"]
-    users_collection = db["users"]
-    logger.info("Successfully connected to MongoDB.")
-except Exception as e:
-    logger.error(f"Failed to connect to MongoDB: {e}")
-    # Initialize as None to prevent import errors
+# Created per worker process by the app lifespan (see core/lifespan.py);
+# a client inherited across fork() is never reused
+client = None
+db = None
+_client_pid = None
+
+
+def _event_listeners():
+    if not settings.METRICS_ENABLED:
+        return []
+    from utils.metrics import MongoCommandMetrics
+    return [MongoCommandMetrics()]
+
+
+def connect():
+    """Creates the client for this process. The async client connects lazily."""
+    global client, db, _client_pid
+    if client is not None and _client_pid == os.getpid():
+        return
+    try:
+        logger.info("Connecting to MongoDB...")
+        # Pool size and timeouts are explicit so a slow or unreachable
+        # cluster fails fast instead of queueing requests.
+        client = AsyncMongoClient(
+            settings.MONGO_URI,
+            tlsCAFile=certifi.where(),
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+            connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=_event_listeners(),
+        )
+        db = client[settings.MONGO_DB_NAME]
+        _client_pid = os.getpid()
+        logger.info("MongoDB client initialized.")
+    except Exception as e:
+        logger.error("Failed to connect to MongoDB: %s", e)
+        client = None
+        db = None
+
+
+async def warm_up():
+    """Opens the first pooled connection so the first request does not pay for it."""
+    if client is None:
+        return
+    try:
+        await client.admin.command("ping")
+    except Exception as e:
+        logger.warning("MongoDB warm-up failed: %s", e)
+
+
+async def close():
+    global client, db
+    if client is not None:
+        await client.close()
     client = None
     db = None
-    assets_collection = None
-    users_collection = None
 
 def check_db_connection():
     from fastapi import HTTPException
     if db is None:
         raise HTTPException(status_code=503, detail="Database Unavailable")
 
+# (collection, keys, options) for every index the routes rely on
+INDEXES = [
+    # Backs keyset pagination of GET /assets/ on (uploaded_at, file_id)
+    ("assets", [("uploaded_at", DESCENDING), ("file_id", DESCENDING)], {"name": "uploaded_at_file_id"}),
+    ("assets", "file_id", {"unique": True, "name": "file_id_unique"}),
+    # Back GET /assets/search: full-text and prefix search on name, and
+    # multikey tag / uploader filters that keep the listing sort order
+    ("assets", [("name", TEXT)], {"name": "name_text"}),
+    ("assets", [("name", ASCENDING)], {"name": "name"}),
+    (
+        "assets",
+        [("tags", ASCENDING), ("uploaded_at", DESCENDING), ("file_id", DESCENDING)],
+        {"name": "tags_uploaded_at_file_id"},
+    ),
+    (
+        "assets",
+        [("uploaded_by", ASCENDING), ("uploaded_at", DESCENDING), ("file_id", DESCENDING)],
+        {"name": "uploaded_by_uploaded_at_file_id"},
+    ),
+    ("assets", [("geometry.vertex_count", ASCENDING)], {"name": "geometry_vertex_count"}),
+    ("jobs", "job_id", {"unique": True, "name": "job_id_unique"}),
+    # Finished jobs get an expires_at and are purged by the TTL monitor
+    ("jobs", "expires_at", {"expireAfterSeconds": 0, "name": "expires_at_ttl"}),
+    # Idempotency-Key records: completed responses and stale claims expire
+    ("idempotency_keys", "expires_at", {"expireAfterSeconds": 0, "name": "expires_at_ttl"}),
+    ("users", "email", {"unique": True, "name": "email_unique"}),
+    # Unverified accounts are purged once their verification OTP expires,
+    # freeing the email for a fresh registration
+    (
+        "users",
+        "verification_otp_expires_at",
+        {
+            "expireAfterSeconds": 0,
+            "partialFilterExpression": {"is_verified": False},
+            "name": "unverified_otp_ttl",
+        },
+    ),
+]
+
+
+async def ensure_indexes():
+    """
+    Creates the indexes the routes rely on. Safe to call on every startup.
+    Each index is created on its own, so one failure (e.g. duplicate data or
+    a conflicting existing index) does not skip the rest.
+    """
+    if db is None:
+        logger.warning("Skipping index creation: database unavailable.")
+        return
+
+    failed = 0
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except Exception as e:
+            failed += 1
+            logger.error("Failed to create MongoDB index %s.%s: %s", collection, options["name"], e)
+    if failed:
+        logger.error("%s of %s MongoDB indexes could not be created", failed, len(INDEXES))
+    else:
+        logger.info("MongoDB indexes ensured.")
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+from core import aws_client, database
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def _migrate_users():
+    """Drops pre-hashing OTP fields; a no-op once every user is migrated."""
+    if database.db is None:
+        return
+    from repositories.user_repository import user_repository
+    try:
+        expired, cleaned = await user_repository.migrate_legacy_otps()
+        if expired or cleaned:
+            logger.info("Migrated legacy OTPs: %s unverified users expired, %s users cleaned", expired, cleaned)
+    except Exception as e:
+        logger.error("Failed to migrate legacy user OTPs: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Owns every long-lived resource of a worker process. Clients are created
+    here rather than at import, so each forked worker gets its own Mongo and
+    S3 clients, and connection pools and indexes are ready before the first
+    request. Phase durations are kept on app.state.startup_timings.
+    """
+    from utils.email import mail_dispatcher
+    from utils.health import dependency_monitor
+    from utils.preview_pipeline import preview_pipeline
+    from utils.security import password_hasher
+
+    timings = {}
+    started = time.perf_counter()
+
+    def mark(phase, since):
+        timings[phase] = round(time.perf_counter() - since, 4)
+        return time.perf_counter()
+
+    step = time.perf_counter()
+    database.connect()
+    step = mark("mongo_client", step)
+    await run_in_threadpool(aws_client.connect)
+    step = mark("s3_client", step)
+
+    # Index creation and pool warm-up overlap; neither blocks startup on failure
+    await asyncio.gather(
+        database.ensure_indexes(),
+        _migrate_users(),
+        database.warm_up(),
+        run_in_threadpool(aws_client.warm_up),
+    )
+    step = mark("warm_up", step)
+
+    preview_pipeline.start()
+    mail_dispatcher.start()
+    dependency_monitor.start()
+    loop_monitor = None
+    if settings.METRICS_ENABLED:
+        from utils.metrics import monitor_event_loop_lag
+        loop_monitor = asyncio.create_task(monitor_event_loop_lag())
+    mark("background_workers", step)
+    mark("total", started)
+
+    app.state.startup_timings = timings
+    logger.info("Startup complete in %.3fs: %s", timings['total'], timings)
+    try:
+        yield
+    finally:
+        if loop_monitor is not None:
+            loop_monitor.cancel()
+        await dependency_monitor.stop()
+        await preview_pipeline.stop()
+        await mail_dispatcher.stop()
+        password_hasher.shutdown()
+        await database.close()
+        aws_client.close()
+        logger.info("Shutdown complete.")
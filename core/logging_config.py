@@ -0,0 +1,224 @@
+"""
+Logging pipeline.
+
+Loggers only build a record and put it on an in-memory queue; a background
+QueueListener thread formats and writes it, so stream I/O and traceback
+formatting never run on the event loop. Every record carries the id of the
+request it was logged from, and INFO records from noisy per-request loggers
+are kept for a sample of requests only.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from uuid import uuid4
+import orjson
+from core.config import settings
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+# Argument types that cannot change between the log call and the listener formatting it
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None), bytes, BaseException)
+
+
+def _args(record):
+    return record.args.values() if isinstance(record.args, dict) else record.args
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id on the record; runs on the calling thread."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps INFO and lower records from the given loggers for `rate` of
+    requests. The decision is derived from the request id, so a sampled
+    request keeps all of its logs. Warnings and errors always pass.
+    """
+
+    def __init__(self, rate: float, loggers):
+        super().__init__()
+        self.threshold = int(rate * 10000)
+        self.loggers = tuple(name for name in loggers if name)
+        self.dropped = 0
+
+    def _sampled(self, request_id):
+        if request_id == "-":
+            return random.random() * 10000 < self.threshold
+        return zlib.crc32(request_id.encode()) % 10000 < self.threshold
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or self.threshold >= 10000:
+            return True
+        if not record.name.startswith(self.loggers):
+            return True
+        if self._sampled(getattr(record, "request_id", "-")):
+            return True
+        self.dropped += 1
+        return False
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message and traceback formatting to the
+    listener thread. The stdlib prepare() formats eagerly so records can be
+    pickled; this queue is in-process, so only records whose arguments could
+    be mutated before the listener runs are formatted here.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        if record.args and not all(isinstance(arg, _IMMUTABLE_ARGS) for arg in _args(record)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block the caller; dropping is preferable to stalling requests
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any fields passed through `extra`."""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+queue_handler = None
+sampling_filter = None
+_listener = None
+
+
+def _start_listener():
+    global _listener
+    log_queue = queue.Queue(settings.LOG_QUEUE_MAX_SIZE)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(
+        JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    )
+    queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def setup_logging():
+    """
+    Routes the root logger (and uvicorn's loggers) through the queue.
+    Safe to call more than once.
+    """
+    global queue_handler, sampling_filter
+    if queue_handler is not None:
+        return
+
+    sampling_filter = SamplingFilter(settings.LOG_SAMPLE_RATE, settings.LOG_SAMPLED_LOGGERS)
+    queue_handler = LazyQueueHandler(None)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(sampling_filter)
+    _start_listener()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL)
+
+    # uvicorn installs its own stream handlers; send its records through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    # A forked worker does not inherit the listener thread, and the parent's
+    # queue lock may be held mid-write, so the child starts its own
+    os.register_at_fork(after_in_child=_start_listener)
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread (at exit)."""
+    if _listener is not None:
+        _listener.stop()
+
+
+def stats() -> dict:
+    return {
+        "queued": queue_handler.queue.qsize() if queue_handler else 0,
+        "dropped": queue_handler.dropped if queue_handler else 0,
+        "sampled_out": sampling_filter.dropped if sampling_filter else 0,
+    }
+
+
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._\-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware giving each request an id, taken from the incoming
+    REQUEST_ID_HEADER when it is well-formed, and echoing it on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.REQUEST_ID_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self.header:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(self.header, request_id.encode())]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        await self.app(scope, receive, send_wrapper)
+        # Not reset on error: unhandled exceptions are logged by the outer
+        # ServerErrorMiddleware, which should still see the id
+        request_id_var.reset(token)
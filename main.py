@@ -1,19 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
 import logging
+from core.logging_config import RequestIdMiddleware, setup_logging
+from core.lifespan import lifespan
+from utils.responses import FastJSONResponse
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    force=True
-)
+# Configure logging (queued, written by a background thread)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="3D Editor Asset Manager",
     version="1.0.0",
     description="FastAPI backend for managing 3D assets and previews stored in AWS S3 + MongoDB",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 from starlette.middleware.sessions import SessionMiddleware
@@ -45,46 +46,29 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Include Routers with Error Handling
-try:
-    from routes import assets
-    app.include_router(assets.router)
-    logger.info("Assets router included successfully.")
-except Exception as e:
-    logger.error(f"Failed to include assets router: {e}")
-
-try:
-
-    from routes import health
-
-    app.include_router(health.router)
-
-    logger.info("Health router included successfully.")
-
-except Exception as e:
-
-    logger.error(f"Failed to include health router: {e}")
-
-
-
-try:
-
-    from routes import auth
-
-    app.include_router(auth.router)
+# Request ids: outside CORS and sessions so every log line of a request carries it
+app.add_middleware(RequestIdMiddleware)
 
-    logger.info("Auth router included successfully.")
+# Include Routers (an import error should fail startup, not drop routes)
+from routes import assets, auth, health
 
-except Exception as e:
+app.include_router(assets.router)
+app.include_router(health.router)
+app.include_router(auth.router)
 
-    logger.error(f"Failed to include auth router: {e}")
+# Metrics: outermost middleware so latency covers the whole stack
+if settings.METRICS_ENABLED:
+    from routes import metrics
+    from utils.metrics import MetricsMiddleware
 
+    app.include_router(metrics.router)
+    app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
 def home():
     return {"message": "3D Editor FastAPI Backend 🚀"}
 
-logger.info("Application startup complete. Ready to serve requests.")
+logger.info("Application imported. Clients are created per worker on startup.")
 
 # Run: uvicorn backend.main:app --reload
@@ -1,8 +1,48 @@
 # backend/models/asset_model.py
 from pydantic import BaseModel, HttpUrl, Field, ConfigDict
-from typing import Optional, List
+from typing import Optional, List, Literal, Dict
 from datetime import datetime
 
+class GeometryBounds(BaseModel):
+    min: List[float]
+    max: List[float]
+
+
+class EmbeddedTexture(BaseModel):
+    index: int
+    mime_type: Optional[str] = None
+    byte_length: int
+
+
+class Geometry(BaseModel):
+    """Summary of a .glb file, read from its header and JSON chunk during upload"""
+    mesh_count: int
+    primitive_count: int
+    material_count: int
+    texture_count: int
+    image_count: int
+    node_count: int
+    animation_count: int
+    vertex_count: int
+    triangle_count: int
+    bounds: Optional[GeometryBounds] = Field(default=None, description="Union of POSITION accessor min/max")
+    file_size: int
+    json_size: int
+    bin_size: int
+    embedded_textures: List[EmbeddedTexture] = Field(default_factory=list)
+    embedded_texture_bytes: int = 0
+
+
+class PreviewVariant(BaseModel):
+    """A resized copy of the thumbnail generated in the background"""
+    size: int = Field(..., description="Longest edge in pixels")
+    format: str
+    content_type: str
+    key: str
+    url: HttpUrl
+    byte_length: int
+
+
 class AssetBase(BaseModel):
     """Shared attributes for assets (used for both DB and response)"""
     file_id: str = Field(..., description="Unique ID for the asset (UUID)")
@@ -15,6 +55,12 @@ class AssetBase(BaseModel):
     uploaded_by: Optional[str] = Field(default="Unknown", description="Uploader name")
     uploaded_at: datetime = Field(default_factory=datetime.utcnow, description="Upload timestamp")
     tags: List[str] = Field(default_factory=list, description="Tags for search/filtering")
+    content_hash: Optional[str] = Field(default=None, description="SHA-256 of the model file")
+    geometry: Optional[Geometry] = Field(default=None, description="Model geometry summary")
+    thumbnail_content_type: Optional[str] = Field(default=None, description="Detected thumbnail image type")
+    previews: List[PreviewVariant] = Field(default_factory=list, description="Resized thumbnail variants")
+    version: int = Field(default=1, description="Incremented on every metadata change")
+    updated_at: Optional[datetime] = Field(default=None, description="Last metadata change")
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -28,3 +74,109 @@ class AssetCreate(BaseModel):
 class AssetResponse(AssetBase):
     """Response model returned by the API"""
     message: Optional[str] = Field(default="Upload successful ✅")
+    preview_job_id: Optional[str] = Field(default=None, description="Job generating the thumbnail previews")
+
+
+class UploadUrlRequest(BaseModel):
+    """Request for presigned URLs to upload a model (and thumbnail) straight to S3"""
+    file_name: str = Field(..., pattern=r"^[^/\\]+$", description="Filename of the .glb model")
+    content_type: str = Field(default="model/gltf-binary")
+    thumbnail_file_name: Optional[str] = Field(default=None, pattern=r"^[^/\\]+$")
+    thumbnail_content_type: str = Field(default="image/jpeg")
+    method: Literal["put", "post"] = Field(default="put", description="Presigned PUT URL or POST form")
+    multipart: bool = Field(default=False, description="Presign a multipart upload for the model")
+    part_count: int = Field(default=1, ge=1, le=10000, description="Number of parts when multipart")
+
+
+class PresignedPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class UploadTarget(BaseModel):
+    """Where and how the client should upload one object"""
+    key: str
+    method: Literal["PUT", "POST", "MULTIPART"]
+    url: Optional[str] = None
+    fields: Optional[Dict[str, str]] = None
+    headers: Optional[Dict[str, str]] = None
+    upload_id: Optional[str] = None
+    parts: Optional[List[PresignedPart]] = None
+
+
+class UploadUrlResponse(BaseModel):
+    file_id: str
+    model: UploadTarget
+    thumbnail: Optional[UploadTarget] = None
+    expires_in: int
+
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(..., ge=1)
+    etag: str
+
+
+class FinalizeUploadRequest(BaseModel):
+    """Confirms a presigned upload and creates the asset record"""
+    file_name: str = Field(..., pattern=r"^[^/\\]+$")
+    thumbnail_file_name: Optional[str] = Field(default=None, pattern=r"^[^/\\]+$")
+    name: Optional[str] = Field(default="Untitled Asset")
+    tags: List[str] = Field(default_factory=list)
+    upload_id: Optional[str] = Field(default=None, description="Multipart upload ID, if multipart")
+    parts: Optional[List[CompletedPart]] = Field(default=None, description="Uploaded parts, if multipart")
+
+
+class AssetFilter(BaseModel):
+    """Selects assets by metadata; all given conditions must match"""
+    uploaded_by: Optional[str] = None
+    tags: Optional[List[str]] = Field(default=None, description="Assets having any of these tags")
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+
+
+class BulkDeleteRequest(BaseModel):
+    """Either an explicit list of file_ids or a non-empty filter"""
+    file_ids: Optional[List[str]] = Field(default=None, min_length=1)
+    filter: Optional[AssetFilter] = None
+
+
+class BulkDeleteResult(BaseModel):
+    file_id: str
+    status: Literal["deleted", "not_found", "failed"]
+    detail: Optional[str] = None
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
+    results: List[BulkDeleteResult]
+    truncated: bool = Field(
+        default=False,
+        description="More assets matched the filter than one request deletes; repeat it for the rest",
+    )
+
+
+class BatchUploadResult(BaseModel):
+    index: int = Field(..., description="Position of the file in the request")
+    file_name: str
+    status: Literal["uploaded", "failed"]
+    asset: Optional[AssetResponse] = None
+    detail: Optional[str] = None
+
+
+class BatchUploadResponse(BaseModel):
+    uploaded: int
+    failed: int
+    results: List[BatchUploadResult]
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    type: str
+    file_id: str
+    status: Literal["queued", "running", "retrying", "succeeded", "failed"]
+    attempts: int
+    error: Optional[str] = None
+    previews: List[PreviewVariant] = Field(default_factory=list)
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
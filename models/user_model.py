@@ -16,7 +16,12 @@ class UserInDB(UserBase):
     hashed_password: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     provider: str = Field(default="email") # email, google
-    verification_otp: Optional[str] = None
+    token_version: int = 0
+    # OTPs are stored only as HMACs, each with its own expiry
+    verification_otp_hash: Optional[str] = None
+    verification_otp_expires_at: Optional[datetime] = None
+    reset_otp_hash: Optional[str] = None
+    reset_otp_expires_at: Optional[datetime] = None
 
 class Token(BaseModel):
     access_token: str
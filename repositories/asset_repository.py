@@ -0,0 +1,207 @@
+import asyncio
+import re
+from datetime import datetime
+from core import database
+from core.config import settings
+from repositories.base import MongoRepository
+from utils.cache import ReadThroughCache, create_cache_backend
+from utils.pagination import ASSET_SORT
+
+asset_cache = ReadThroughCache(
+    "assets",
+    create_cache_backend("assets", settings.ASSET_CACHE_MAX_ENTRIES),
+    ttl=settings.ASSET_CACHE_TTL_SECONDS,
+)
+
+
+class AssetRepository(MongoRepository):
+    """Async data access for asset metadata documents."""
+
+    collection_name = "assets"
+    # Document in the counters collection bumped on every asset write; it
+    # is the validator for listings
+    counter_id = "assets"
+
+    async def get(self, file_id: str, projection: dict = None):
+        return await self.collection.find_one(
+            {"file_id": file_id}, projection or {"_id": 0}
+        )
+
+    async def get_cached(self, file_id: str):
+        """
+        Returns the asset through the read-through cache. The returned
+        document is shared with other callers and must not be mutated.
+        """
+        return await asset_cache.get_or_load(file_id, lambda: self.get(file_id))
+
+    async def list_page(self, query: dict, projection: dict, limit: int):
+        cursor = self.collection.find(query, projection).sort(ASSET_SORT).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def stream(self, query: dict, projection: dict, limit: int = None):
+        """Yields documents as they arrive from the Mongo cursor."""
+        cursor = self.collection.find(query, projection).sort(ASSET_SORT)
+        if limit:
+            cursor = cursor.limit(limit)
+        try:
+            async for doc in cursor:
+                yield doc
+        finally:
+            await cursor.close()
+
+    async def find_many(self, query: dict, projection: dict, limit: int):
+        cursor = self.collection.find(query, projection).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def search(self, query: dict, cursor_filter: dict, projection: dict,
+                     limit: int, facet_limit: int):
+        """
+        Returns a page of matches, the total match count and per-tag facet
+        counts. The page is an indexed find + sort + limit (inside $facet the
+        sort could not use an index); the counts come from one aggregation,
+        run concurrently.
+        """
+        page_query = query
+        if cursor_filter:
+            page_query = {"$and": [query, cursor_filter]} if query else cursor_filter
+        pipeline = [
+            {"$match": query},
+            {"$facet": {
+                "tags": [
+                    {"$unwind": "$tags"},
+                    {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                    {"$limit": facet_limit},
+                ],
+                "total": [{"$count": "count"}],
+            }},
+        ]
+
+        async def counts():
+            cursor = await self.collection.aggregate(pipeline)
+            return (await cursor.to_list(length=1))[0]
+
+        assets, result = await asyncio.gather(
+            self.list_page(page_query, projection, limit), counts()
+        )
+        return {
+            "assets": assets,
+            "tags": [{"tag": t["_id"], "count": t["count"]} for t in result["tags"]],
+            "total": result["total"][0]["count"] if result["total"] else 0,
+        }
+
+    async def estimated_count(self) -> int:
+        return await self.collection.estimated_document_count()
+
+    async def change_marker(self):
+        """Returns (seq, updated_at) of the collection-level change counter."""
+        counter = await database.db["counters"].find_one({"_id": self.counter_id})
+        if not counter:
+            return 0, None
+        return counter["seq"], counter["updated_at"]
+
+    async def _bump_change_marker(self):
+        # Bumped after the write, so a marker read before a data read never
+        # describes newer data than the response carries
+        await database.db["counters"].update_one(
+            {"_id": self.counter_id},
+            {"$inc": {"seq": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    @staticmethod
+    def _stamp(document: dict):
+        document.setdefault("version", 1)
+        document.setdefault("updated_at", document.get("uploaded_at") or datetime.utcnow())
+
+    async def insert(self, document: dict):
+        self._stamp(document)
+        await self.collection.insert_one(document)
+        await asset_cache.invalidate(document["file_id"])
+        await self._bump_change_marker()
+
+    async def insert_many(self, documents: list):
+        """Inserts unordered; a BulkWriteError reports which documents failed."""
+        for document in documents:
+            self._stamp(document)
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        finally:
+            for document in documents:
+                await asset_cache.invalidate(document["file_id"])
+            await self._bump_change_marker()
+
+    async def update(self, file_id: str, values: dict) -> bool:
+        result = await self.collection.update_one(
+            {"file_id": file_id},
+            {"$set": {**values, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+        )
+        await asset_cache.invalidate(file_id)
+        if result.matched_count:
+            await self._bump_change_marker()
+        return result.matched_count > 0
+
+    async def delete(self, file_id: str) -> bool:
+        result = await self.collection.delete_one({"file_id": file_id})
+        await asset_cache.invalidate(file_id)
+        if result.deleted_count:
+            await self._bump_change_marker()
+        return result.deleted_count > 0
+
+    async def delete_many(self, file_ids: list) -> int:
+        if not file_ids:
+            return 0
+        result = await self.collection.delete_many({"file_id": {"$in": file_ids}})
+        for file_id in file_ids:
+            await asset_cache.invalidate(file_id)
+        if result.deleted_count:
+            await self._bump_change_marker()
+        return result.deleted_count
+
+
+asset_repository = AssetRepository()
+
+
+def asset_filter_query(asset_filter) -> dict:
+    """Translates an AssetFilter into a Mongo query."""
+    query = {}
+    if asset_filter.uploaded_by:
+        query["uploaded_by"] = asset_filter.uploaded_by
+    if asset_filter.tags:
+        query["tags"] = {"$in": asset_filter.tags}
+    if asset_filter.uploaded_after or asset_filter.uploaded_before:
+        query["uploaded_at"] = {}
+        if asset_filter.uploaded_after:
+            query["uploaded_at"]["$gte"] = asset_filter.uploaded_after
+        if asset_filter.uploaded_before:
+            query["uploaded_at"]["$lt"] = asset_filter.uploaded_before
+    return query
+
+
+def search_query(text=None, prefix=None, tags=None, exclude_tags=None,
+                 uploaded_by=None, uploaded_after=None, uploaded_before=None,
+                 max_vertices=None) -> dict:
+    """Builds the Mongo query for GET /assets/search."""
+    query = {}
+    if text:
+        query["$text"] = {"$search": text}
+    if prefix:
+        # Anchored, case-sensitive regex so the name index can be used
+        query["name"] = {"$regex": "^" + re.escape(prefix)}
+    if tags or exclude_tags:
+        query["tags"] = {}
+        if tags:
+            query["tags"]["$all"] = tags
+        if exclude_tags:
+            query["tags"]["$nin"] = exclude_tags
+    if uploaded_by:
+        query["uploaded_by"] = uploaded_by
+    if uploaded_after or uploaded_before:
+        query["uploaded_at"] = {}
+        if uploaded_after:
+            query["uploaded_at"]["$gte"] = uploaded_after
+        if uploaded_before:
+            query["uploaded_at"]["$lt"] = uploaded_before
+    if max_vertices is not None:
+        query["geometry.vertex_count"] = {"$lte": max_vertices}
+    return query
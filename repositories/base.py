@@ -0,0 +1,12 @@
+from core import database
+
+
+class MongoRepository:
+    """Base for async repositories backed by a single collection."""
+
+    collection_name = None
+
+    @property
+    def collection(self):
+        # Resolved on every call so the repository follows the active client
+        return database.db[self.collection_name]
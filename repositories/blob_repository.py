@@ -0,0 +1,63 @@
+from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from repositories.base import MongoRepository
+
+
+class BlobRepository(MongoRepository):
+    """
+    Reference-counted, content-addressed model blobs.
+    Documents are keyed by the SHA-256 of the file (`_id`) and point at the
+    S3 object shared by every asset with that content.
+    """
+
+    collection_name = "blobs"
+
+    async def get(self, digest: str):
+        return await self.collection.find_one({"_id": digest})
+
+    async def acquire(self, digest: str):
+        """Adds a reference to an existing blob; returns it, or None if unknown."""
+        return await self.collection.find_one_and_update(
+            {"_id": digest, "ref_count": {"$gt": 0}},
+            {"$inc": {"ref_count": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def register(self, digest: str, key: str, url: str, size: int):
+        """
+        Records a newly stored blob with one reference. Returns None when an
+        identical upload registered the same digest first.
+        """
+        blob = {
+            "_id": digest,
+            "key": key,
+            "url": url,
+            "size": size,
+            "ref_count": 1,
+            "created_at": datetime.utcnow(),
+        }
+        try:
+            await self.collection.insert_one(blob)
+        except DuplicateKeyError:
+            return None
+        return blob
+
+    async def release(self, digest: str, count: int = 1):
+        """
+        Drops references. Returns the S3 key once the last reference is gone
+        (the caller deletes the object), otherwise None.
+        """
+        blob = await self.collection.find_one_and_update(
+            {"_id": digest},
+            {"$inc": {"ref_count": -count}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if blob is None or blob["ref_count"] > 0:
+            return None
+        # Only delete if nobody re-acquired it in the meantime
+        result = await self.collection.delete_one({"_id": digest, "ref_count": {"$lte": 0}})
+        return blob["key"] if result.deleted_count else None
+
+
+blob_repository = BlobRepository()
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from repositories.base import MongoRepository
+
+
+class IdempotencyRepository(MongoRepository):
+    """
+    Idempotency-Key records, keyed by "<scope>:<key>" (`_id`). A record is
+    "in_progress" while its owner handles the request and "completed" once
+    the response is stored; expires_at drives the TTL index.
+    """
+
+    collection_name = "idempotency_keys"
+
+    async def get(self, record_id: str):
+        return await self.collection.find_one({"_id": record_id})
+
+    async def claim(self, record_id: str, owner: str, lock_seconds: float, ttl_seconds: float):
+        """
+        Marks the key in progress for `owner`. Returns (True, None) when the
+        claim succeeded, otherwise (False, existing record), where the record
+        is None if it was released in the meantime.
+        """
+        now = datetime.utcnow()
+        record = {
+            "_id": record_id,
+            "status": "in_progress",
+            "owner": owner,
+            "created_at": now,
+            "locked_until": now + timedelta(seconds=lock_seconds),
+            "expires_at": now + timedelta(seconds=ttl_seconds),
+        }
+        try:
+            await self.collection.insert_one(record)
+            return True, None
+        except DuplicateKeyError:
+            pass
+
+        # Take over a claim whose owner died without completing or releasing it
+        taken = await self.collection.find_one_and_update(
+            {"_id": record_id, "status": "in_progress", "locked_until": {"$lt": now}},
+            {"$set": {"owner": owner, "locked_until": now + timedelta(seconds=lock_seconds)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if taken is not None:
+            return True, None
+        return False, await self.get(record_id)
+
+    async def complete(self, record_id: str, owner: str, status_code: int, body: bytes,
+                       ttl_seconds: float):
+        """Stores the response; returns False if the claim was lost meanwhile."""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": record_id, "owner": owner, "status": "in_progress"},
+            {"$set": {
+                "status": "completed",
+                "status_code": status_code,
+                "body": body,
+                "completed_at": now,
+                "expires_at": now + timedelta(seconds=ttl_seconds),
+            }},
+        )
+        return result.modified_count == 1
+
+    async def release(self, record_id: str, owner: str):
+        """Drops an in-progress claim so the request can be retried."""
+        await self.collection.delete_one(
+            {"_id": record_id, "owner": owner, "status": "in_progress"}
+        )
+
+
+idempotency_repository = IdempotencyRepository()
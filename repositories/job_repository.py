@@ -0,0 +1,24 @@
+from datetime import datetime
+from repositories.base import MongoRepository
+
+
+class JobRepository(MongoRepository):
+    """Async data access for background job status documents."""
+
+    collection_name = "jobs"
+
+    async def get(self, job_id: str):
+        return await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+
+    async def create(self, job: dict):
+        job.setdefault("created_at", datetime.utcnow())
+        job.setdefault("updated_at", job["created_at"])
+        await self.collection.insert_one(job)
+        job.pop("_id", None)
+
+    async def update(self, job_id: str, values: dict):
+        values["updated_at"] = datetime.utcnow()
+        await self.collection.update_one({"job_id": job_id}, {"$set": values})
+
+
+job_repository = JobRepository()
@@ -0,0 +1,140 @@
+from datetime import datetime
+from core.config import settings
+from models.user_model import UserBase
+from repositories.base import MongoRepository
+from utils.cache import ReadThroughCache, create_cache_backend
+
+user_cache = ReadThroughCache(
+    "users",
+    create_cache_backend("users", settings.USER_CACHE_MAX_ENTRIES),
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+class UserRepository(MongoRepository):
+    """Async data access for user accounts, keyed by email."""
+
+    collection_name = "users"
+
+    async def get_by_email(self, email: str):
+        return await self.collection.find_one({"email": email})
+
+    async def get_auth_cached(self, email: str):
+        """
+        Returns (UserBase, token_version) for authenticating requests, or None.
+        Served from a short-TTL cache; every write below invalidates it. The
+        returned user is shared with other callers and must not be mutated.
+        """
+        return await user_cache.get_or_load(email, lambda: self._load_auth(email))
+
+    async def _load_auth(self, email: str):
+        user = await self.collection.find_one(
+            {"email": email},
+            {
+                "_id": 0, "email": 1, "full_name": 1, "is_active": 1,
+                "is_superuser": 1, "is_verified": 1, "token_version": 1,
+            },
+        )
+        if user is None:
+            return None
+        return UserBase(**user), user.get("token_version", 0)
+
+    async def create(self, user: dict):
+        """Raises DuplicateKeyError when the email is taken (unique index)."""
+        await self.collection.insert_one(user)
+        await user_cache.invalidate(user["email"])
+
+    async def consume_verification_otp(self, email: str, otp_hash: str) -> bool:
+        """Marks the user verified if the OTP matches and has not expired."""
+        user = await self.collection.find_one_and_update(
+            {
+                "email": email,
+                "is_verified": False,
+                "verification_otp_hash": otp_hash,
+                "verification_otp_expires_at": {"$gt": datetime.utcnow()},
+            },
+            {
+                "$set": {"is_verified": True},
+                "$unset": {"verification_otp_hash": "", "verification_otp_expires_at": ""},
+            },
+            projection={"_id": 1},
+        )
+        await user_cache.invalidate(email)
+        return user is not None
+
+    async def set_reset_otp(self, email: str, otp_hash: str, expires_at: datetime) -> bool:
+        """Stores a reset OTP for password (non-OAuth) accounts only."""
+        user = await self.collection.find_one_and_update(
+            {"email": email, "provider": {"$ne": "google"}},
+            {"$set": {"reset_otp_hash": otp_hash, "reset_otp_expires_at": expires_at}},
+            projection={"_id": 1},
+        )
+        return user is not None
+
+    async def exists(self, email: str) -> bool:
+        return await self.collection.find_one({"email": email}, {"_id": 1}) is not None
+
+    async def has_valid_reset_otp(self, email: str, otp_hash: str) -> bool:
+        """Checks the reset OTP without consuming it (reset_password does that)."""
+        user = await self.collection.find_one(
+            {
+                "email": email,
+                "reset_otp_hash": otp_hash,
+                "reset_otp_expires_at": {"$gt": datetime.utcnow()},
+            },
+            {"_id": 1},
+        )
+        return user is not None
+
+    async def reset_password(self, email: str, otp_hash: str, hashed_password: str) -> bool:
+        """
+        Sets a new password if the reset OTP matches and has not expired,
+        consuming the OTP and revoking previously issued tokens.
+        """
+        user = await self.collection.find_one_and_update(
+            {
+                "email": email,
+                "reset_otp_hash": otp_hash,
+                "reset_otp_expires_at": {"$gt": datetime.utcnow()},
+            },
+            {
+                "$set": {"hashed_password": hashed_password},
+                "$unset": {"reset_otp_hash": "", "reset_otp_expires_at": ""},
+                "$inc": {"token_version": 1},
+            },
+            projection={"_id": 1},
+        )
+        await user_cache.invalidate(email)
+        return user is not None
+
+    async def migrate_legacy_otps(self) -> tuple:
+        """
+        One-time cleanup of accounts written before OTPs were hashed. Their
+        plaintext verification_otp/reset_otp can no longer be checked, so it
+        is dropped; unverified accounts get an already-passed expiry so the
+        TTL index purges them and the email can register again. Matches
+        nothing once migrated. Returns (expired, cleaned) counts.
+        """
+        cleaned = await self.collection.update_many(
+            {"$or": [{"verification_otp": {"$exists": True}}, {"reset_otp": {"$exists": True}}]},
+            {"$unset": {"verification_otp": "", "reset_otp": ""}},
+        )
+        expired = await self.collection.update_many(
+            {"is_verified": False, "verification_otp_expires_at": None},
+            {"$set": {"verification_otp_expires_at": datetime.utcnow()}},
+        )
+        return expired.modified_count, cleaned.modified_count
+
+    async def update_by_email(self, email: str, values: dict, revoke_tokens: bool = False):
+        """
+        Applies $set values. revoke_tokens bumps token_version, invalidating
+        every access token issued before the change.
+        """
+        update = {"$set": values}
+        if revoke_tokens:
+            update["$inc"] = {"token_version": 1}
+        await self.collection.update_one({"email": email}, update)
+        await user_cache.invalidate(email)
+
+
+user_repository = UserRepository()
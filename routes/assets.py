@@ -1,120 +1,810 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Form
-from datetime import datetime
-from models.asset_model import AssetResponse
-from core.database import assets_collection
-from utils.s3_utils import upload_to_s3, delete_from_s3
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timezone
+from typing import List, Optional
+import asyncio
+import hashlib
+from uuid import UUID, uuid4
+from email.utils import format_datetime, parsedate_to_datetime
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from models.asset_model import (
+    AssetBase, AssetResponse, UploadUrlRequest, UploadUrlResponse, FinalizeUploadRequest,
+    BulkDeleteRequest, BulkDeleteResponse, BatchUploadResponse, JobStatus
+)
+from core.config import settings
+from utils.s3_utils import (
+    S3StreamingUpload, upload_to_s3, delete_many_from_s3, build_s3_key, build_s3_url, head_s3_object,
+    generate_presigned_upload, generate_presigned_multipart_upload, complete_multipart_upload,
+    generate_presigned_download, get_s3_object
+)
 from core.database import check_db_connection
+from repositories.asset_repository import asset_repository, asset_filter_query, search_query
+from repositories.blob_repository import blob_repository
+from repositories.job_repository import job_repository
+from utils.cache import MemoryCacheBackend, ReadThroughCache
+from utils.glb import GLBError, GLBInspector
+from utils.http_cache import cache_headers, is_not_modified, make_etag, not_modified_response
+from utils.idempotency import IDEMPOTENCY_HEADER, IdempotencyGuard
+from utils.image_utils import ImageTypeSniffer, sniff_image_type
+from utils.multipart_stream import stream_multipart_form
+from utils.preview_pipeline import preview_pipeline
+from utils.pagination import encode_cursor, keyset_filter, parse_projection
+from utils.responses import FastJSONResponse, dumps
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/assets", tags=["Assets"])
 
+# Presigned GET URLs are reused for a while so redirects stay stable (and
+# browser-cacheable) instead of being re-signed on every request
+presigned_download_cache = ReadThroughCache(
+    "presigned_downloads",
+    MemoryCacheBackend(settings.ASSET_CACHE_MAX_ENTRIES),
+    ttl=min(settings.DOWNLOAD_REDIRECT_CACHE_SECONDS, settings.PRESIGNED_URL_EXPIRE_SECONDS / 2),
+)
+
 
 # Upload Asset
-@router.post("/upload/", response_model=AssetResponse)
-async def upload_asset(
-    file: UploadFile = File(...),
-    thumbnail: UploadFile = File(None),
-    name: str = Form("Untitled Asset")
-):
+# The multipart body is parsed as it streams in and each file part is piped
+# straight into S3, so nothing is spooled to disk and the model and thumbnail
+# transfers overlap. Clients that retry should send an Idempotency-Key: a
+# retry then gets the original response instead of uploading again.
+upload_idempotency = IdempotencyGuard("upload_asset")
+
+UPLOAD_FORM_SCHEMA = {
+    "parameters": [{
+        "name": IDEMPOTENCY_HEADER,
+        "in": "header",
+        "required": False,
+        "schema": {"type": "string", "maxLength": 255},
+        "description": "Unique per logical upload; retries with the same key return the "
+                       "first response without transferring the file again",
+    }],
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "thumbnail": {"type": "string", "format": "binary"},
+                        "name": {"type": "string", "default": "Untitled Asset"},
+                        "sha256": {
+                            "type": "string",
+                            "description": "Optional SHA-256 of the model, sent before the file, "
+                                           "so already stored content is not transferred again",
+                        },
+                    },
+                }
+            }
+        },
+    }
+}
+
+UPLOAD_PARTS = {
+    "file": ("assets/models", "model/gltf-binary"),
+    "thumbnail": ("assets/previews", "image/jpeg"),
+}
+
+
+@router.post("/upload/", response_model=AssetResponse, openapi_extra=UPLOAD_FORM_SCHEMA)
+async def upload_asset(request: Request):
     check_db_connection()
-    logger.info(f"Starting upload for file: {file.filename}")
+    idempotency, replay = await upload_idempotency.begin(request)
+    if replay is not None:
+        return replay
+    file_id = str(uuid4())
+    uploads = {}
+    # Reads the GLB header and JSON chunk from the same stream sent to S3
+    inspector = GLBInspector()
+    # Content address of the model, used to store identical files only once
+    hasher = hashlib.sha256()
+    content_hash = None
+
+    async def open_file(field_name, filename, content_type, fields):
+        if field_name not in UPLOAD_PARTS or not filename:
+            return None
+        if field_name in uploads:
+            raise HTTPException(status_code=400, detail=f"Only one '{field_name}' may be uploaded")
+
+        logger.info("Starting upload for file: %s", filename)
+        folder, stored_type = UPLOAD_PARTS[field_name]
+        upload = S3StreamingUpload(
+            build_s3_key(folder, file_id, filename), stored_type,
+            observers=[inspector, hasher] if field_name == "file" else None,
+        )
+        if field_name == "thumbnail":
+            # Store the thumbnail with its real type rather than assuming JPEG
+            upload.observers.append(ImageTypeSniffer(upload))
+        elif fields.get("sha256") and await blob_repository.get(fields["sha256"].lower()):
+            # The client announced content we already store: only hash the
+            # stream to verify the claim, without sending it to S3 again
+            upload.discard()
+        upload.filename = filename
+        uploads[field_name] = upload
+        return upload
 
     try:
-        # Upload model file
-        file_id, model_key, model_url = upload_to_s3(
-            file, "assets/models", "model/gltf-binary"
+        fields = await stream_multipart_form(request, open_file)
+        if "file" not in uploads:
+            raise HTTPException(status_code=400, detail="A model file is required")
+        geometry = inspector.finish()
+
+        model = uploads["file"]
+        thumbnail = uploads.get("thumbnail")
+        digest = hasher.hexdigest()
+        if model.discarding and digest != fields["sha256"].lower():
+            raise HTTPException(status_code=400, detail="sha256 does not match the uploaded file")
+
+        # Finish the model and thumbnail transfers concurrently
+        blob, thumbnail_result = await asyncio.gather(
+            _store_blob(model, digest),
+            thumbnail.complete() if thumbnail else asyncio.sleep(0),
+            return_exceptions=True,
         )
+        if not isinstance(blob, BaseException):
+            content_hash = digest
+            # The blob now owns the model object; it is released, not aborted
+            del uploads["file"]
+        for result in (blob, thumbnail_result):
+            if isinstance(result, BaseException):
+                raise result
 
-        # Upload thumbnail if present
-        thumbnail_url, thumb_key = None, None
+        metadata = _asset_document(
+            file_id, model.filename, blob["key"], blob["url"],
+            thumbnail.file_key if thumbnail else None,
+            build_s3_url(thumbnail.file_key) if thumbnail else None,
+            fields.get("name") or "Untitled Asset",
+        )
+        metadata["content_hash"] = content_hash
+        metadata["geometry"] = geometry
         if thumbnail:
-            _, thumb_key, thumbnail_url = upload_to_s3(
-                thumbnail, "assets/previews", "image/jpeg"
-            )
-
-        metadata = {
-            "file_id": file_id,
-            "file_name": file.filename,
-            "model_url": model_url,
-            "model_key": model_key,
-            "thumbnail_url": thumbnail_url,
-            "thumbnail_key": thumb_key,
-            "uploaded_at": datetime.utcnow(),
-            "uploaded_by": "Ananya",
-            "name": name,
-            "tags": []
-        }
+            metadata["thumbnail_content_type"] = thumbnail.content_type
 
         # Insert into DB
-        assets_collection.insert_one(metadata)
+        await asset_repository.insert(metadata)
 
         # Remove Mongo _id before response
         metadata.pop("_id", None)
         metadata["message"] = "Upload successful ✅"
+        await _queue_previews(metadata)
+
+        logger.info("Upload successful for file_id: %s", file_id)
+        # The document is already in response shape; skip re-validation
+        response = FastJSONResponse(metadata)
+        await upload_idempotency.complete(idempotency, response)
+        return response
+
+    except BaseException as e:
+        await upload_idempotency.release(idempotency)
+        await asyncio.gather(*(upload.abort() for upload in uploads.values()))
+        if content_hash:
+            await _delete_asset_objects([{"file_id": file_id, "content_hash": content_hash}])
+        # Cancellation, KeyboardInterrupt and SystemExit propagate after cleanup
+        if not isinstance(e, Exception) or isinstance(e, HTTPException):
+            raise
+        if isinstance(e, GLBError):
+            logger.warning("Rejected invalid GLB upload: %s", e)
+            raise HTTPException(status_code=400, detail=f"Invalid GLB file: {e}")
+        logger.error("Upload failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _store_blob(upload, digest):
+    """
+    Points the upload at a shared blob. If the content is already stored the
+    transfer is dropped (small files never reach S3; parts of large ones are
+    aborted); otherwise the object is completed and registered as a new blob.
+    """
+    blob = await blob_repository.acquire(digest)
+    if blob is not None:
+        await upload.abort()
+        logger.info("Deduplicated upload against blob %s", digest)
+        return blob
+    if upload.discarding:
+        raise HTTPException(status_code=409, detail="Stored copy was removed; upload again without sha256")
+
+    await upload.complete()
+    blob = await blob_repository.register(
+        digest, upload.file_key, build_s3_url(upload.file_key), upload.size
+    )
+    if blob is None:
+        # An identical upload registered first: share its object instead
+        await upload.abort()
+        blob = await blob_repository.acquire(digest)
+        if blob is None:
+            raise HTTPException(status_code=409, detail="Concurrent upload conflict, please retry")
+    return blob
+
+
+# Batch Upload (many model/thumbnail pairs, bounded concurrent S3 transfers)
+@router.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_assets_batch(
+    files: List[UploadFile] = File(..., description="Model files"),
+    thumbnails: List[UploadFile] = File(None, description="Thumbnails, paired with files by position"),
+    names: List[str] = Form(None, description="Asset names, paired with files by position"),
+):
+    check_db_connection()
+    if len(files) > settings.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_UPLOAD_MAX_FILES} files can be uploaded at once"
+        )
+
+    thumbnails = thumbnails or []
+    names = names or []
+    slots = asyncio.Semaphore(settings.BATCH_UPLOAD_CONCURRENCY)
+
+    async def upload_one(index, file):
+        async with slots:
+            # The spooled file is hashed locally first so known content
+            # skips the S3 transfer entirely
+            digest, size = await run_in_threadpool(_sha256_file, file.file)
+            blob = await blob_repository.acquire(digest)
+            if blob is None:
+                file_id, model_key, model_url = await upload_to_s3(
+                    file, "assets/models", "model/gltf-binary"
+                )
+                blob = await blob_repository.register(digest, model_key, model_url, size)
+                if blob is None:
+                    await run_in_threadpool(delete_many_from_s3, [model_key])
+                    blob = await blob_repository.acquire(digest)
+                    if blob is None:
+                        raise HTTPException(status_code=409, detail="Concurrent upload conflict, please retry")
+            else:
+                file_id = str(uuid4())
+
+            name = names[index] if index < len(names) and names[index] else "Untitled Asset"
+            document = _asset_document(file_id, file.filename, blob["key"], blob["url"], name=name)
+            document["content_hash"] = digest
+
+            thumbnail = thumbnails[index] if index < len(thumbnails) else None
+            if thumbnail is not None and thumbnail.filename:
+                try:
+                    # Same type detection as the streaming upload, JPEG when unknown
+                    thumbnail_type = sniff_image_type(await thumbnail.read(12)) or "image/jpeg"
+                    _, document["thumbnail_key"], document["thumbnail_url"] = await upload_to_s3(
+                        thumbnail, "assets/previews", thumbnail_type
+                    )
+                except Exception:
+                    await _delete_asset_objects([document])
+                    raise
+            return document
+
+    outcomes = await asyncio.gather(
+        *(upload_one(index, file) for index, file in enumerate(files)),
+        return_exceptions=True,
+    )
+
+    results, documents = [], []
+    for index, (file, outcome) in enumerate(zip(files, outcomes)):
+        if isinstance(outcome, BaseException):
+            detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+            logger.error("Batch upload failed for %s: %s", file.filename, detail)
+            results.append({"index": index, "file_name": file.filename, "status": "failed", "detail": detail})
+        else:
+            documents.append((index, outcome))
+
+    # Write all metadata in one round trip; unordered so one bad document
+    # does not block the rest.
+    failed_writes = {}
+    if documents:
+        try:
+            await asset_repository.insert_many([document for _, document in documents])
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed_writes[error["index"]] = error.get("errmsg", "Database write failed")
+        except Exception as e:
+            logger.error("Batch metadata insert failed: %s", e)
+            failed_writes = {position: str(e) for position in range(len(documents))}
+
+    orphaned = []
+    for position, (index, document) in enumerate(documents):
+        document.pop("_id", None)
+        if position in failed_writes:
+            orphaned.append(document)
+            results.append({
+                "index": index, "file_name": document["file_name"],
+                "status": "failed", "detail": failed_writes[position],
+            })
+        else:
+            document["message"] = "Upload successful ✅"
+            await _queue_previews(document)
+            results.append({
+                "index": index, "file_name": document["file_name"],
+                "status": "uploaded", "asset": document,
+            })
+
+    if orphaned:
+        await _delete_asset_objects(orphaned)
 
-        logger.info(f"Upload successful for file_id: {file_id}")
-        return metadata
+    results.sort(key=lambda result: result["index"])
+    uploaded = sum(1 for result in results if result["status"] == "uploaded")
+    logger.info("Batch upload finished: %s uploaded, %s failed", uploaded, len(results) - uploaded)
+    return {"uploaded": uploaded, "failed": len(results) - uploaded, "results": results}
 
+
+def _asset_document(file_id, file_name, model_key, model_url,
+                    thumb_key=None, thumbnail_url=None, name="Untitled Asset", tags=None):
+    return {
+        "file_id": file_id,
+        "file_name": file_name,
+        "model_url": model_url,
+        "model_key": model_key,
+        "thumbnail_url": thumbnail_url,
+        "thumbnail_key": thumb_key,
+        "uploaded_at": datetime.utcnow(),
+        "uploaded_by": "Ananya",
+        "name": name,
+        "tags": tags or []
+    }
+
+
+def _sha256_file(fileobj):
+    fileobj.seek(0)
+    digest, size = hashlib.sha256(), 0
+    for chunk in iter(lambda: fileobj.read(1024 * 1024), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def _asset_s3_keys(asset):
+    """
+    S3 objects owned by a single asset: thumbnail, previews, and the model
+    unless it is a shared (content-addressed) blob.
+    """
+    keys = [asset.get("thumbnail_key")]
+    if not asset.get("content_hash"):
+        keys.append(asset.get("model_key"))
+    keys += [preview["key"] for preview in asset.get("previews") or []]
+    return [key for key in keys if key]
+
+
+async def _delete_asset_objects(assets) -> dict:
+    """
+    Deletes the assets' own objects in one batched call, then releases their
+    model blob references; a shared model is only deleted with its last
+    reference. Returns {file_id: error} for assets whose objects could not be
+    removed; their blob references are kept so the delete can be retried.
+    """
+    keys = [key for asset in assets for key in _asset_s3_keys(asset)]
+    failed_keys = await run_in_threadpool(delete_many_from_s3, keys) if keys else {}
+
+    failed, references = {}, {}
+    for asset in assets:
+        errors = [failed_keys[key] for key in _asset_s3_keys(asset) if key in failed_keys]
+        if errors:
+            failed[asset["file_id"]] = errors[0]
+        elif asset.get("content_hash"):
+            references[asset["content_hash"]] = references.get(asset["content_hash"], 0) + 1
+
+    # One release per distinct blob, dropping all of its references at once
+    released = await asyncio.gather(*(
+        blob_repository.release(digest, count=count) for digest, count in references.items()
+    ))
+    released = [key for key in released if key]
+    if released:
+        for key, error in (await run_in_threadpool(delete_many_from_s3, released)).items():
+            logger.error("Failed to delete unreferenced blob %s: %s", key, error)
+    return failed
+
+
+async def _queue_previews(metadata):
+    """Schedules background preview generation when the asset has a thumbnail."""
+    if not metadata.get("thumbnail_key"):
+        return
+    try:
+        metadata["preview_job_id"] = await preview_pipeline.enqueue(
+            metadata["file_id"], metadata["thumbnail_key"]
+        )
+    except Exception as e:
+        logger.error("Failed to queue previews for %s: %s", metadata['file_id'], e)
+
+
+# Presigned Upload URLs (client uploads straight to S3)
+@router.post("/upload-url", response_model=UploadUrlResponse)
+def create_upload_url(request: UploadUrlRequest):
+    file_id = str(uuid4())
+    model_key = build_s3_key("assets/models", file_id, request.file_name)
+
+    if request.multipart:
+        model_target = generate_presigned_multipart_upload(
+            model_key, request.content_type, request.part_count
+        )
+    else:
+        model_target = generate_presigned_upload(
+            model_key, request.content_type, request.method
+        )
+
+    thumbnail_target = None
+    if request.thumbnail_file_name:
+        thumb_key = build_s3_key("assets/previews", file_id, request.thumbnail_file_name)
+        thumbnail_target = generate_presigned_upload(
+            thumb_key, request.thumbnail_content_type, request.method
+        )
+
+    logger.info("Issued presigned upload for file_id: %s", file_id)
+    return {
+        "file_id": file_id,
+        "model": model_target,
+        "thumbnail": thumbnail_target,
+        "expires_in": settings.PRESIGNED_URL_EXPIRE_SECONDS,
+    }
+
+
+# Finalize Presigned Upload (verify objects in S3, then store metadata)
+@router.post("/{file_id}/finalize", response_model=AssetResponse)
+async def finalize_upload(file_id: str, request: FinalizeUploadRequest):
+    check_db_connection()
+    try:
+        UUID(file_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid file_id")
+
+    model_key = build_s3_key("assets/models", file_id, request.file_name)
+    if request.upload_id:
+        if not request.parts:
+            raise HTTPException(status_code=400, detail="parts are required to complete a multipart upload")
+        await run_in_threadpool(
+            complete_multipart_upload,
+            model_key, request.upload_id, [p.model_dump() for p in request.parts]
+        )
+
+    if await run_in_threadpool(head_s3_object, model_key) is None:
+        raise HTTPException(status_code=400, detail="Model file has not been uploaded")
+
+    thumb_key, thumbnail_url = None, None
+    if request.thumbnail_file_name:
+        thumb_key = build_s3_key("assets/previews", file_id, request.thumbnail_file_name)
+        if await run_in_threadpool(head_s3_object, thumb_key) is None:
+            raise HTTPException(status_code=400, detail="Thumbnail has not been uploaded")
+        thumbnail_url = build_s3_url(thumb_key)
+
+    metadata = _asset_document(
+        file_id, request.file_name, model_key, build_s3_url(model_key),
+        thumb_key, thumbnail_url, request.name, request.tags
+    )
+
+    try:
+        await asset_repository.insert(metadata)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Asset already finalized")
     except Exception as e:
-        logger.error(f"Upload failed: {e}")
+        logger.error("Finalize failed for file_id %s: %s", file_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
+    metadata.pop("_id", None)
+    metadata["message"] = "Upload successful ✅"
+    await _queue_previews(metadata)
+
+    logger.info("Finalized presigned upload for file_id: %s", file_id)
+    return FastJSONResponse(metadata)
 
-# List All Assets
+
+# List Assets (keyset-paginated, optionally streamed as NDJSON)
 @router.get("/")
-def list_assets():
+async def list_assets(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    stream: bool = Query(False, description="Stream assets as NDJSON instead of a single page"),
+    max_vertices: Optional[int] = Query(None, ge=0, description="Only assets with at most this many vertices"),
+):
     check_db_connection()
+
+    query = keyset_filter(cursor) if cursor else {}
+    if max_vertices is not None:
+        query["geometry.vertex_count"] = {"$lte": max_vertices}
+    projection = (
+        parse_projection(fields, AssetBase.model_fields) if fields else {"_id": 0}
+    )
+
     try:
-        assets = list(assets_collection.find({}, {"_id": 0}))
-        logger.info(f"Retrieved {len(assets)} assets")
-        return {"total": len(assets), "assets": assets}
+        # Validators come from the collection change counter plus the query
+        # parameters, so an unchanged listing is answered without querying
+        seq, last_modified = await asset_repository.change_marker()
+        etag = make_etag("assets", seq, sorted(request.query_params.multi_items()))
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        if stream:
+            # Documents are written out as the Mongo cursor yields them; a
+            # limit is only applied when the client asks for one.
+            return StreamingResponse(
+                _ndjson_lines(asset_repository.stream(query, projection, limit)),
+                media_type="application/x-ndjson",
+                headers=cache_headers(etag, last_modified),
+            )
+
+        page_size = limit or settings.DEFAULT_PAGE_SIZE
+        # Fetch one extra document to know whether another page exists
+        assets = await asset_repository.list_page(query, projection, page_size + 1)
+        has_more = len(assets) > page_size
+        assets = assets[:page_size]
+
+        page = {
+            "count": len(assets),
+            "next_cursor": encode_cursor(assets[-1]) if has_more else None,
+            "assets": assets,
+        }
+        # The estimate covers the whole collection, so it is only meaningful
+        # unfiltered; /assets/search returns an exact total for filters
+        if max_vertices is None:
+            page = {"total": await asset_repository.estimated_count(), **page}
+
+        logger.info("Retrieved %s assets", len(assets))
+        return FastJSONResponse(page, headers=cache_headers(etag, last_modified))
     except Exception as e:
-        logger.error(f"Failed to list assets: {e}")
+        logger.error("Failed to list assets: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Search Assets (text / prefix / tag / uploader / date filters with tag facets)
+@router.get("/search")
+async def search_assets(
+    q: Optional[str] = Query(None, description="Full-text search on the asset name"),
+    prefix: Optional[str] = Query(None, description="Case-sensitive name prefix"),
+    tags: Optional[List[str]] = Query(None, description="Assets must have all of these tags"),
+    exclude_tags: Optional[List[str]] = Query(None, description="Assets must have none of these tags"),
+    uploaded_by: Optional[str] = Query(None),
+    uploaded_after: Optional[datetime] = Query(None),
+    uploaded_before: Optional[datetime] = Query(None),
+    max_vertices: Optional[int] = Query(None, ge=0, description="Only assets with at most this many vertices"),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    facet_limit: int = Query(20, ge=1, le=200, description="Number of tag facets to return"),
+):
+    check_db_connection()
+
+    query = search_query(
+        q, prefix, tags, exclude_tags, uploaded_by, uploaded_after, uploaded_before,
+        max_vertices
+    )
+    cursor_filter = keyset_filter(cursor) if cursor else {}
+    projection = (
+        parse_projection(fields, AssetBase.model_fields) if fields else {"_id": 0}
+    )
+
+    try:
+        # Fetch one extra document to know whether another page exists
+        result = await asset_repository.search(
+            query, cursor_filter, projection, limit + 1, facet_limit
+        )
+        assets = result["assets"]
+        has_more = len(assets) > limit
+        assets = assets[:limit]
+
+        logger.info("Search matched %s assets", result['total'])
+        return FastJSONResponse({
+            "total": result["total"],
+            "count": len(assets),
+            "next_cursor": encode_cursor(assets[-1]) if has_more else None,
+            "assets": assets,
+            "facets": {"tags": result["tags"]},
+        })
+    except Exception as e:
+        logger.error("Failed to search assets: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _ndjson_lines(documents):
+    async for doc in documents:
+        yield dumps(doc) + b"\n"
+
+
+# Bulk Delete Assets (batched S3 DeleteObjects + a single delete_many)
+@router.post("/bulk-delete", response_model=BulkDeleteResponse)
+async def bulk_delete_assets(request: BulkDeleteRequest):
+    check_db_connection()
+    limit = settings.BULK_DELETE_MAX_ASSETS
+
+    if (request.file_ids is None) == (request.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of file_ids or filter")
+    if request.filter is not None and not request.filter.model_dump(exclude_none=True):
+        raise HTTPException(status_code=400, detail="filter must contain at least one condition")
+
+    if request.file_ids is not None:
+        requested = list(dict.fromkeys(request.file_ids))
+        if len(requested) > limit:
+            raise HTTPException(status_code=400, detail=f"At most {limit} assets can be deleted at once")
+        query = {"file_id": {"$in": requested}}
+    else:
+        requested = None
+        query = asset_filter_query(request.filter)
+
+    try:
+        # One extra match tells whether the filter selected more than the cap
+        assets = await asset_repository.find_many(
+            query,
+            {
+                "_id": 0, "file_id": 1, "model_key": 1, "thumbnail_key": 1,
+                "previews.key": 1, "content_hash": 1,
+            },
+            limit + 1,
+        )
+        truncated = len(assets) > limit
+        assets = assets[:limit]
+
+        failed = await _delete_asset_objects(assets)
+
+        results, deleted_ids = [], []
+        for asset in assets:
+            if asset["file_id"] in failed:
+                results.append({"file_id": asset["file_id"], "status": "failed", "detail": failed[asset["file_id"]]})
+            else:
+                deleted_ids.append(asset["file_id"])
+                results.append({"file_id": asset["file_id"], "status": "deleted"})
+
+        # Only drop documents whose objects are gone, so failures can be retried
+        await asset_repository.delete_many(deleted_ids)
+
+        if requested is not None:
+            found = {asset["file_id"] for asset in assets}
+            results.extend(
+                {"file_id": file_id, "status": "not_found"}
+                for file_id in requested if file_id not in found
+            )
+
+        logger.info("Bulk deleted %s assets (%s failed)", len(deleted_ids), len(failed))
+        return {"deleted": len(deleted_ids), "results": results, "truncated": truncated}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Bulk delete failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # Get Asset by ID
 @router.get("/{file_id}")
-def get_asset(file_id: str):
+async def get_asset(file_id: str, request: Request):
     check_db_connection()
     try:
-        asset = assets_collection.find_one({"file_id": file_id}, {"_id": 0})
+        asset = await asset_repository.get_cached(file_id)
         if not asset:
-            logger.warning(f"Asset not found: {file_id}")
+            logger.warning("Asset not found: %s", file_id)
             raise HTTPException(status_code=404, detail="Asset not found")
-        return asset
+
+        # Documents written before versioning fall back to version 0
+        last_modified = asset.get("updated_at") or asset.get("uploaded_at")
+        etag = make_etag(file_id, asset.get("version", 0))
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        return FastJSONResponse(asset, headers=cache_headers(etag, last_modified))
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving asset {file_id}: {e}")
+        logger.error("Error retrieving asset %s: %s", file_id, e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Preview Job Status
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    check_db_connection()
+    job = await job_repository.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# Download Model / Thumbnail (streamed proxy with Range and conditional GET)
+@router.get("/{file_id}/model")
+async def download_model(
+    file_id: str,
+    request: Request,
+    redirect: bool = Query(False, description="Redirect to a presigned S3 URL instead of streaming"),
+):
+    return await _proxy_asset_object(file_id, "model_key", request, redirect)
+
+
+@router.get("/{file_id}/thumbnail")
+async def download_thumbnail(
+    file_id: str,
+    request: Request,
+    redirect: bool = Query(False, description="Redirect to a presigned S3 URL instead of streaming"),
+):
+    return await _proxy_asset_object(file_id, "thumbnail_key", request, redirect)
+
+
+async def _proxy_asset_object(file_id, key_field, request, redirect):
+    check_db_connection()
+    asset = await asset_repository.get_cached(file_id)
+    if not asset or not asset.get(key_field):
+        raise HTTPException(status_code=404, detail="Asset not found")
+    file_key = asset[key_field]
+
+    if redirect:
+        url = await presigned_download_cache.get_or_load(
+            file_key, lambda: run_in_threadpool(generate_presigned_download, file_key)
+        )
+        return RedirectResponse(url, status_code=307)
+
+    if_modified_since = None
+    if request.headers.get("if-modified-since"):
+        try:
+            if_modified_since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            pass
+
+    from botocore.exceptions import ClientError  # deferred with boto3, see core/aws_client
+
+    try:
+        obj = await run_in_threadpool(
+            get_s3_object, file_key,
+            range_header=request.headers.get("range"),
+            if_none_match=request.headers.get("if-none-match"),
+            if_modified_since=if_modified_since,
+        )
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        headers = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+        if code in ("304", "NotModified"):
+            return Response(status_code=304, headers={"ETag": headers.get("etag", "")})
+        if code in ("412", "PreconditionFailed"):
+            return Response(status_code=412)
+        if code == "InvalidRange":
+            return Response(status_code=416, headers={"Content-Range": "bytes */*"})
+        if code in ("NoSuchKey", "404"):
+            raise HTTPException(status_code=404, detail="File not found in storage")
+        logger.error("S3 download failed for %s: %s", file_key, e)
         raise HTTPException(status_code=500, detail=str(e))
 
+    response_headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(obj["ContentLength"]),
+        "ETag": obj["ETag"],
+        "Last-Modified": format_datetime(obj["LastModified"].astimezone(timezone.utc), usegmt=True),
+    }
+    if obj.get("ContentRange"):
+        response_headers["Content-Range"] = obj["ContentRange"]
+
+    return StreamingResponse(
+        _iter_s3_body(obj["Body"]),
+        status_code=206 if obj.get("ContentRange") else 200,
+        media_type=obj.get("ContentType") or "application/octet-stream",
+        headers=response_headers,
+    )
+
+
+def _iter_s3_body(body):
+    # Sync generator: Starlette reads it on a worker thread, one chunk at a time
+    try:
+        yield from body.iter_chunks(settings.DOWNLOAD_CHUNK_SIZE)
+    finally:
+        body.close()
+
 
 # Delete Asset (from S3 + DB)
 @router.delete("/{file_id}")
-def delete_asset(file_id: str):
+async def delete_asset(file_id: str):
     check_db_connection()
     try:
-        asset = assets_collection.find_one({"file_id": file_id})
+        asset = await asset_repository.get(file_id)
         if not asset:
-            logger.warning(f"Asset not found for deletion: {file_id}")
+            logger.warning("Asset not found for deletion: %s", file_id)
             raise HTTPException(status_code=404, detail="Asset not found")
 
-        # Delete model file
-        delete_from_s3(asset["model_key"])
-
-        # Delete thumbnail if exists
-        if asset.get("thumbnail_key"):
-            delete_from_s3(asset["thumbnail_key"])
+        # Delete thumbnail and previews in one DeleteObjects call; the model
+        # object goes once no other asset references the same content
+        failed = await _delete_asset_objects([asset])
+        if failed:
+            raise HTTPException(status_code=500, detail=f"S3 delete failed: {failed[file_id]}")
 
-        assets_collection.delete_one({"file_id": file_id})
-        logger.info(f"Asset deleted successfully: {file_id}")
+        await asset_repository.delete(file_id)
+        logger.info("Asset deleted successfully: %s", file_id)
         return {"message": "Asset deleted successfully ✅"}
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting asset {file_id}: {e}")
+        logger.error("Error deleting asset %s: %s", file_id, e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,31 +1,45 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from authlib.integrations.starlette_client import OAuth
 from starlette.responses import RedirectResponse
 
-from core.database import users_collection, check_db_connection
+from core.database import check_db_connection
 from core.config import settings
 from models.user_model import (
     UserCreate, UserInDB, Token, TokenData, UserBase, 
     PasswordResetRequest, PasswordResetConfirm
 )
 from models.otp_model import OTPVerify
-from utils.security import get_password_hash, verify_password, create_access_token, generate_otp
+from pymongo.errors import DuplicateKeyError
+from utils.security import (
+    get_password_hash, verify_and_update_password, create_access_token, generate_otp,
+    hash_otp, otp_expiry
+)
 from utils.email import send_verification_email, send_reset_password_email
+from repositories.user_repository import user_repository
+from utils.rate_limit import limit_by_email, limit_by_ip
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-# OAuth Setup
-oauth = OAuth()
-oauth.register(
-    name='google',
-    client_id=settings.GOOGLE_CLIENT_ID,
-    client_secret=settings.GOOGLE_CLIENT_SECRET,
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={'scope': 'openid email profile'}
-)
+# OAuth Setup (deferred: authlib and its HTTP client load on the first Google login)
+_oauth = None
+
+def get_oauth():
+    global _oauth
+    if _oauth is None:
+        from authlib.integrations.starlette_client import OAuth
+
+        oauth = OAuth()
+        oauth.register(
+            name='google',
+            client_id=settings.GOOGLE_CLIENT_ID,
+            client_secret=settings.GOOGLE_CLIENT_SECRET,
+            server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+            client_kwargs={'scope': 'openid email profile'}
+        )
+        _oauth = oauth
+    return _oauth
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     check_db_connection()
@@ -42,22 +56,28 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    
-    user = users_collection.find_one({"email": token_data.email})
-    if user is None:
+
+    cached = await user_repository.get_auth_cached(token_data.email)
+    if cached is None:
         raise credentials_exception
-    
-    # Map _id to id if necessary for your UserBase model
-    user["id"] = str(user["_id"])
-    return UserBase(**user)
 
-@router.post("/register", response_model=dict)
-async def register(user: UserCreate):
+    # Tokens issued before a password reset or deactivation carry an older version
+    user, token_version = cached
+    if payload.get("tv", 0) != token_version or not user.is_active:
+        raise credentials_exception
+    return user
+
+@router.post(
+    "/register", response_model=dict,
+    dependencies=[Depends(limit_by_ip("register", settings.RATE_LIMIT_REGISTER_IP))],
+)
+async def register(user: UserCreate, request: Request, response: Response):
     check_db_connection()
-    if users_collection.find_one({"email": user.email}):
+    await limit_by_email("register", settings.RATE_LIMIT_REGISTER_EMAIL, user.email, request, response)
+    # Cheap check first so duplicate registrations never pay for bcrypt
+    if await user_repository.exists(user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     verification_otp = generate_otp()
     
     # Exclude fields that are set by the server to prevent duplicates/overwrites
@@ -67,41 +87,47 @@ async def register(user: UserCreate):
         **user_data,
         hashed_password=hashed_password,
         provider="email",
-        verification_otp=verification_otp,
+        verification_otp_hash=hash_otp(user.email, verification_otp),
+        verification_otp_expires_at=otp_expiry(),
         is_verified=False
     ).model_dump()
     
-    users_collection.insert_one(user_dict)
+    # The unique email index still settles concurrent registrations
+    try:
+        await user_repository.create(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     await send_verification_email(user.email, verification_otp)
     
     return {"message": "OTP sent to email. Please verify."}
 
-@router.post("/verify-email", response_model=dict)
-async def verify_email(data: OTPVerify):
+@router.post(
+    "/verify-email", response_model=dict,
+    dependencies=[Depends(limit_by_ip("verify-email", settings.RATE_LIMIT_VERIFY_EMAIL_IP))],
+)
+async def verify_email(data: OTPVerify, request: Request, response: Response):
     check_db_connection()
-    user = users_collection.find_one({"email": data.email})
-    
+    await limit_by_email("verify-email", settings.RATE_LIMIT_VERIFY_EMAIL_EMAIL, data.email, request, response)
+    if await user_repository.consume_verification_otp(data.email, hash_otp(data.email, data.otp)):
+        return {"message": "Email verified successfully. You can now login."}
+
+    # Failure path only: read the user to report why
+    user = await user_repository.get_by_email(data.email)
     if not user:
         raise HTTPException(status_code=400, detail="User not found")
-        
     if user.get("is_verified"):
         return {"message": "Email already verified"}
-        
-    if user.get("verification_otp") != data.otp:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-        
-    users_collection.update_one(
-        {"email": data.email},
-        {"$set": {"is_verified": True, "verification_otp": None}}
-    )
-    
-    return {"message": "Email verified successfully. You can now login."}
+    raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
-@router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+@router.post(
+    "/login", response_model=Token,
+    dependencies=[Depends(limit_by_ip("login", settings.RATE_LIMIT_LOGIN_IP))],
+)
+async def login(request: Request, response: Response, form_data: OAuth2PasswordRequestForm = Depends()):
     check_db_connection()
+    await limit_by_email("login", settings.RATE_LIMIT_LOGIN_EMAIL, form_data.username, request, response)
     # OAuth2PasswordRequestForm uses 'username' for the email field by default
-    user = users_collection.find_one({"email": form_data.username})
+    user = await user_repository.get_by_email(form_data.username)
     
     if not user:
         raise HTTPException(
@@ -116,12 +142,17 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             detail="Please login with Google",
         )
 
-    if not verify_password(form_data.password, user["hashed_password"]):
+    valid, new_hash = await verify_and_update_password(form_data.password, user["hashed_password"])
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Transparently upgrade hashes made with an older bcrypt cost
+    if new_hash:
+        await user_repository.update_by_email(user["email"], {"hashed_password": new_hash})
         
     if not user.get("is_verified", False):
          raise HTTPException(
@@ -129,13 +160,29 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             detail="Email not verified. Please verify your email first.",
         )
 
-    access_token = create_access_token(data={"sub": user["email"]})
+    access_token = create_access_token(
+        data={"sub": user["email"], "tv": user.get("token_version", 0)}
+    )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.post("/forgot-password", response_model=dict)
-async def forgot_password(request: PasswordResetRequest):
+@router.post(
+    "/forgot-password", response_model=dict,
+    dependencies=[Depends(limit_by_ip("forgot-password", settings.RATE_LIMIT_FORGOT_PASSWORD_IP))],
+)
+async def forgot_password(data: PasswordResetRequest, request: Request, response: Response):
     check_db_connection()
-    user = users_collection.find_one({"email": request.email})
+    await limit_by_email(
+        "forgot-password", settings.RATE_LIMIT_FORGOT_PASSWORD_EMAIL, data.email, request, response
+    )
+    reset_otp = generate_otp()
+    if await user_repository.set_reset_otp(
+        data.email, hash_otp(data.email, reset_otp), otp_expiry()
+    ):
+        await send_reset_password_email(data.email, reset_otp)
+        return {"message": "Password reset OTP sent to email"}
+
+    # Failure path only: read the user to report why
+    user = await user_repository.get_by_email(data.email)
     if not user:
         # Don't reveal that the user doesn't exist, just pretend to send
         # or raise 404 if less security sensitive. Standard practice is often to return success.
@@ -144,49 +191,41 @@ async def forgot_password(request: PasswordResetRequest):
         # I'll choose specific error for this dev context.
         raise HTTPException(status_code=404, detail="User not found")
     
-    if user.get("provider") == "google":
-        raise HTTPException(status_code=400, detail="Please login with Google. Cannot reset password for OAuth accounts.")
+    raise HTTPException(status_code=400, detail="Please login with Google. Cannot reset password for OAuth accounts.")
 
-    reset_otp = generate_otp()
-    users_collection.update_one(
-        {"email": request.email},
-        {"$set": {"reset_otp": reset_otp}}
+@router.post(
+    "/reset-password", response_model=dict,
+    dependencies=[Depends(limit_by_ip("reset-password", settings.RATE_LIMIT_RESET_PASSWORD_IP))],
+)
+async def reset_password(data: PasswordResetConfirm, request: Request, response: Response):
+    check_db_connection()
+    await limit_by_email(
+        "reset-password", settings.RATE_LIMIT_RESET_PASSWORD_EMAIL, data.email, request, response
     )
-    
-    await send_reset_password_email(request.email, reset_otp)
-    
-    return {"message": "Password reset OTP sent to email"}
+    otp_hash = hash_otp(data.email, data.otp)
+    # Only a valid OTP pays for bcrypt; the conditional write below consumes it
+    if await user_repository.has_valid_reset_otp(data.email, otp_hash):
+        hashed_password = await get_password_hash(data.new_password)
+        if await user_repository.reset_password(data.email, otp_hash, hashed_password):
+            return {"message": "Password reset successfully. You can now login."}
 
-@router.post("/reset-password", response_model=dict)
-async def reset_password(data: PasswordResetConfirm):
-    check_db_connection()
-    user = users_collection.find_one({"email": data.email})
-    if not user:
+    # Failure path only: read the user to report why
+    if not await user_repository.exists(data.email):
          raise HTTPException(status_code=404, detail="User not found")
-         
-    if user.get("reset_otp") != data.otp:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-        
-    hashed_password = get_password_hash(data.new_password)
-    
-    users_collection.update_one(
-        {"email": data.email},
-        {"$set": {"hashed_password": hashed_password, "reset_otp": None}}
-    )
-    
-    return {"message": "Password reset successfully. You can now login."}
+    raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
 @router.get("/google")
 async def login_google(request: Request):
     # This automatically creates a 'state' and saves it in the session cookie
     redirect_uri = settings.GOOGLE_REDIRECT_URI
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await get_oauth().google.authorize_redirect(request, redirect_uri)
 
 @router.get("/google/callback")
 async def auth_google(request: Request, response: Response):
     check_db_connection()
     try:
         # This looks for the 'state' in the session cookie to compare
+        oauth = get_oauth()
         token = await oauth.google.authorize_access_token(request)
         user_info = token.get('userinfo')
         if not user_info:
@@ -195,7 +234,7 @@ async def auth_google(request: Request, response: Response):
         raise HTTPException(status_code=400, detail=f"OAuth Logic Error: {str(e)}")
 
     email = user_info.get("email")
-    user = users_collection.find_one({"email": email})
+    user = await user_repository.get_by_email(email)
 
     if not user:
         new_user = UserInDB(
@@ -205,9 +244,15 @@ async def auth_google(request: Request, response: Response):
             provider="google",
             is_verified=True 
         ).model_dump()
-        users_collection.insert_one(new_user)
-    
-    access_token = create_access_token(data={"sub": email})
+        try:
+            await user_repository.create(new_user)
+        except DuplicateKeyError:
+            # A concurrent callback created the account first
+            user = await user_repository.get_by_email(email)
+
+    access_token = create_access_token(
+        data={"sub": email, "tv": user.get("token_version", 0) if user else 0}
+    )
     
     # Example of setting a cookie if desired
     # response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
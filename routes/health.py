@@ -1,7 +1,21 @@
 from fastapi import APIRouter
+from utils.health import dependency_monitor
+from utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
 @router.get("/")
 def health_check():
     return {"status": "ok", "message": "Backend running smoothly 🚀"}
+
+# Liveness: the process is serving requests; never touches dependencies
+@router.get("/live")
+async def liveness():
+    return {"status": "ok"}
+
+# Readiness: last background check of MongoDB and S3 (503 until healthy).
+# async so the cached answer is returned without a threadpool hop
+@router.get("/ready")
+async def readiness():
+    snapshot = dependency_monitor.snapshot()
+    return FastJSONResponse(snapshot, status_code=200 if snapshot["status"] == "ready" else 503)
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from repositories.asset_repository import asset_cache
+from repositories.user_repository import user_cache
+from routes.assets import presigned_download_cache
+from utils import metrics
+from utils.health import dependency_monitor
+
+router = APIRouter(tags=["Metrics"])
+
+metrics.register_component_metrics({
+    "assets": asset_cache,
+    "users": user_cache,
+    "presigned_downloads": presigned_download_cache,
+})
+metrics.CallbackMetric(
+    "xplor_dependency_up", "Result of the last background dependency check.", "gauge",
+    lambda: {(name,): int(check["ok"]) for name, check in dependency_monitor.snapshot()["checks"].items()},
+    ("dependency",),
+)
+
+
+# Prometheus scrape endpoint
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
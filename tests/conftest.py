@@ -0,0 +1,28 @@
+"""
+Repository tests run against an in-memory mongomock-motor client installed
+in place of the real one (tests/support.py, shared with the load benchmark),
+so they need no MongoDB server. Async tests use the anyio pytest plugin.
+"""
+import pytest
+from core import database
+from repositories import asset_repository as asset_module
+from repositories import user_repository as user_module
+from utils.cache import MemoryCacheBackend
+from tests.support import install_mongomock
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db(monkeypatch):
+    """A fresh, indexed database per test, with empty repository caches."""
+    install_mongomock("xplor_test")
+    await database.ensure_indexes()
+    monkeypatch.setattr(asset_module.asset_cache, "backend", MemoryCacheBackend(100))
+    monkeypatch.setattr(user_module.user_cache, "backend", MemoryCacheBackend(100))
+    yield database.db
+    database.client = None
+    database.db = None
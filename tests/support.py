@@ -0,0 +1,35 @@
+"""
+In-memory stand-ins shared by the test suite and benchmarks/load.py.
+"""
+import os
+
+
+def install_mongomock(db_name: str = None):
+    """
+    Points core.database at a fresh in-memory mongomock-motor client, as if
+    database.connect() had run. The database name defaults to
+    MONGO_DB_NAME.
+    """
+    from mongomock_motor import AsyncMongoMockClient
+    from core import database
+
+    client = AsyncMongoMockClient()
+    collection_cls = type(client["probe"]["probe"])
+    if not getattr(collection_cls.aggregate, "awaitable", False):
+        aggregate = collection_cls.aggregate
+
+        # pymongo's async API awaits aggregate(); mongomock-motor returns the cursor directly
+        async def awaitable_aggregate(self, *args, **kwargs):
+            return aggregate(self, *args, **kwargs)
+
+        awaitable_aggregate.awaitable = True
+        collection_cls.aggregate = awaitable_aggregate
+
+    async def close():
+        pass
+
+    client.close = close
+    database.client = client
+    database.db = client[db_name or os.environ["MONGO_DB_NAME"]]
+    database._client_pid = os.getpid()
+    return client
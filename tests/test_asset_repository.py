@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+import pytest
+from repositories.asset_repository import (
+    asset_cache, asset_filter_query, asset_repository, search_query
+)
+from models.asset_model import AssetFilter
+from utils.pagination import keyset_filter, encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2025, 1, 1)
+
+
+def make_asset(i, **values):
+    asset = {
+        "file_id": f"file-{i:03d}",
+        "file_name": f"model_{i}.glb",
+        "name": f"Model {i}",
+        "uploaded_at": NOW - timedelta(minutes=i),
+        "uploaded_by": "ravi" if i % 2 else "meera",
+        "tags": ["chair", "wood"] if i % 2 else ["table"],
+        "geometry": {"vertex_count": i * 100},
+    }
+    asset.update(values)
+    return asset
+
+
+async def test_insert_stamps_version_and_bumps_change_marker(db):
+    assert await asset_repository.change_marker() == (0, None)
+
+    await asset_repository.insert(make_asset(1))
+
+    asset = await asset_repository.get("file-001")
+    assert asset["version"] == 1
+    assert asset["updated_at"] == asset["uploaded_at"]
+    assert "_id" not in asset
+    seq, updated_at = await asset_repository.change_marker()
+    assert seq == 1 and updated_at is not None
+
+
+async def test_get_returns_none_for_unknown_asset(db):
+    assert await asset_repository.get("missing") is None
+
+
+async def test_get_cached_is_invalidated_by_update(db):
+    await asset_repository.insert(make_asset(1))
+    assert (await asset_repository.get_cached("file-001"))["name"] == "Model 1"
+
+    assert await asset_repository.update("file-001", {"name": "Renamed"})
+
+    cached = await asset_repository.get_cached("file-001")
+    assert cached["name"] == "Renamed"
+    assert cached["version"] == 2
+    assert asset_cache.stats()["misses"] == 2
+
+
+async def test_update_of_unknown_asset_leaves_change_marker(db):
+    assert not await asset_repository.update("missing", {"name": "x"})
+    assert await asset_repository.change_marker() == (0, None)
+
+
+async def test_list_page_sorts_newest_first_and_follows_cursor(db):
+    await asset_repository.insert_many([make_asset(i) for i in range(5)])
+
+    first = await asset_repository.list_page({}, {"_id": 0}, 2)
+    assert [a["file_id"] for a in first] == ["file-000", "file-001"]
+
+    second = await asset_repository.list_page(keyset_filter(encode_cursor(first[-1])), {"_id": 0}, 2)
+    assert [a["file_id"] for a in second] == ["file-002", "file-003"]
+
+
+async def test_stream_yields_every_match_in_order(db):
+    await asset_repository.insert_many([make_asset(i) for i in range(4)])
+
+    streamed = [doc["file_id"] async for doc in asset_repository.stream({"uploaded_by": "ravi"}, {"_id": 0})]
+
+    assert streamed == ["file-001", "file-003"]
+
+
+async def test_find_many_honours_limit(db):
+    await asset_repository.insert_many([make_asset(i) for i in range(5)])
+    assert len(await asset_repository.find_many({}, {"_id": 0}, 3)) == 3
+
+
+async def test_search_pages_matches_with_total_and_tag_facets(db):
+    await asset_repository.insert_many([make_asset(i) for i in range(6)])
+    query = search_query(tags=["chair"])
+
+    result = await asset_repository.search(query, {}, {"_id": 0}, limit=2, facet_limit=10)
+
+    assert [a["file_id"] for a in result["assets"]] == ["file-001", "file-003"]
+    assert result["total"] == 3
+    assert result["tags"] == [{"tag": "chair", "count": 3}, {"tag": "wood", "count": 3}]
+
+    cursor_filter = keyset_filter(encode_cursor(result["assets"][-1]))
+    next_page = await asset_repository.search(query, cursor_filter, {"_id": 0}, limit=2, facet_limit=10)
+    assert [a["file_id"] for a in next_page["assets"]] == ["file-005"]
+    assert next_page["total"] == 3
+
+
+async def test_search_query_filters_by_prefix_and_vertices(db):
+    await asset_repository.insert_many([make_asset(i) for i in range(12)])
+
+    result = await asset_repository.search(
+        search_query(prefix="Model 1", max_vertices=1000), {}, {"_id": 0}, limit=10, facet_limit=5
+    )
+
+    assert sorted(a["file_id"] for a in result["assets"]) == ["file-001", "file-010"]
+
+
+async def test_delete_and_delete_many(db):
+    await asset_repository.insert_many([make_asset(i) for i in range(4)])
+
+    assert await asset_repository.delete("file-000")
+    assert not await asset_repository.delete("file-000")
+    assert await asset_repository.delete_many(["file-001", "file-002", "missing"]) == 2
+    assert await asset_repository.delete_many([]) == 0
+    assert [a["file_id"] for a in await asset_repository.find_many({}, {"_id": 0}, 10)] == ["file-003"]
+
+
+async def test_insert_many_invalidates_cached_misses(db):
+    assert await asset_repository.get_cached("file-000") is None
+    await asset_repository.insert_many([make_asset(0)])
+    assert (await asset_repository.get_cached("file-000"))["file_id"] == "file-000"
+
+
+def test_asset_filter_query():
+    query = asset_filter_query(AssetFilter(uploaded_by="ravi", tags=["chair"], uploaded_after=NOW))
+    assert query == {
+        "uploaded_by": "ravi",
+        "tags": {"$in": ["chair"]},
+        "uploaded_at": {"$gte": NOW},
+    }
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from utils.cache import MISSING, MemoryCacheBackend, ReadThroughCache
+
+pytestmark = pytest.mark.anyio
+
+
+class Loader:
+    """Loader that blocks until released and counts its calls."""
+
+    def __init__(self, value="value"):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+
+def make_cache():
+    return ReadThroughCache("test", MemoryCacheBackend(10), ttl=60)
+
+
+async def test_concurrent_misses_share_one_load():
+    cache, loader = make_cache(), Loader()
+
+    callers = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(10)]
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    assert await asyncio.gather(*callers) == ["value"] * 10
+    assert loader.calls == 1
+    assert await cache.get_or_load("key", loader) == "value"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 10
+    assert cache.stats()["coalesced"] == 9
+
+
+async def test_loader_error_reaches_every_caller_and_is_not_cached():
+    cache = make_cache()
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_load("key", failing) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await cache.backend.get("key") is MISSING
+    assert await cache.get_or_load("key", _released(Loader())) == "value"
+
+
+async def test_cancelling_the_first_caller_does_not_fail_the_others():
+    cache, loader = make_cache(), Loader()
+
+    first = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    others = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(3)]
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    assert await asyncio.gather(*others) == ["value"] * 3
+    assert first.cancelled()
+    assert loader.calls == 1
+    assert await cache.backend.get("key") == "value"
+
+
+async def test_invalidation_during_load_is_not_overwritten():
+    cache, stale = make_cache(), Loader("stale")
+
+    in_flight = asyncio.create_task(cache.get_or_load("key", stale))
+    await asyncio.sleep(0)
+    await cache.invalidate("key")
+    stale.release.set()
+
+    # The in-flight caller still gets its result, but it is not stored
+    assert await in_flight == "stale"
+    assert await cache.backend.get("key") is MISSING
+    assert await cache.get_or_load("key", _released(Loader("fresh"))) == "fresh"
+
+
+async def test_invalidation_during_load_starts_a_new_load():
+    cache, stale, fresh = make_cache(), Loader("stale"), Loader("fresh")
+
+    in_flight = asyncio.create_task(cache.get_or_load("key", stale))
+    await asyncio.sleep(0)
+    await cache.invalidate("key")
+    after = asyncio.create_task(cache.get_or_load("key", fresh))
+    await asyncio.sleep(0)
+    fresh.release.set()
+    stale.release.set()
+
+    assert await in_flight == "stale"
+    assert await after == "fresh"
+    assert fresh.calls == 1
+    assert await cache.backend.get("key") == "fresh"
+
+
+def _released(loader):
+    loader.release.set()
+    return loader
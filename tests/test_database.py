@@ -0,0 +1,16 @@
+import pytest
+from core import database
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_failed_index_does_not_skip_the_rest(db):
+    await db["assets"].drop_indexes()
+    await db["users"].drop_indexes()
+    # Duplicate file_ids make the unique file_id index fail
+    await db["assets"].insert_many([{"file_id": "dup"}, {"file_id": "dup"}])
+
+    await database.ensure_indexes()
+
+    assert "file_id_unique" not in await db["assets"].index_information()
+    assert "email_unique" in await db["users"].index_information()
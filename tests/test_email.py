@@ -0,0 +1,199 @@
+"""
+MailDispatcher against a local aiosmtpd server. Tests using the backoff
+fixture retry immediately instead of waiting out the real delays.
+"""
+import asyncio
+import socket
+from email.message import EmailMessage
+import pytest
+from aiosmtpd.controller import Controller
+from core.config import settings
+from utils.email import MailDispatcher
+
+pytestmark = pytest.mark.anyio
+
+
+class Server:
+    """Records delivered messages; replies can be scripted per command."""
+
+    def __init__(self):
+        self.delivered = []
+        self.sessions = set()
+        self.data_replies = []
+        self.rcpt_reply = None
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if self.rcpt_reply:
+            return self.rcpt_reply
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.data_replies:
+            return self.data_replies.pop(0)
+        self.delivered.append(envelope.rcpt_tos[0])
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Listener:
+    """Runs the handler on a local port; restart() drops every connection."""
+
+    def __init__(self, handler, port):
+        self.handler, self.port = handler, port
+        self.controller = None
+
+    def start(self):
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=self.port)
+        self.controller.start()
+
+    def stop(self):
+        self.controller.stop()
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(settings, "SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", port)
+    monkeypatch.setattr(settings, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(settings, "SMTP_USERNAME", None)
+    monkeypatch.setattr(settings, "SMTP_PASSWORD", None)
+    listener = Listener(Server(), port)
+    listener.start()
+    yield listener.handler, listener
+    listener.stop()
+
+
+@pytest.fixture
+def backoff(monkeypatch):
+    """Retries run immediately; returns the delays the dispatcher asked for."""
+    delays = []
+    retry_delay = MailDispatcher._retry_delay
+
+    def record(attempt):
+        delays.append(retry_delay(attempt))
+        return 0
+
+    monkeypatch.setattr(MailDispatcher, "_retry_delay", staticmethod(record))
+    return delays
+
+
+def message(to):
+    mail = EmailMessage()
+    mail["From"] = "noreply@example.com"
+    mail["To"] = to
+    mail["Subject"] = "Test"
+    mail.set_content("Hello")
+    return mail
+
+
+async def settled(dispatcher, expected):
+    for _ in range(200):
+        stats = dispatcher.stats()
+        if stats["sent"] + stats["failed"] >= expected and not stats["retry_pending"]:
+            return stats
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"Dispatcher did not settle: {dispatcher.stats()}")
+
+
+async def test_batch_is_sent_over_one_connection(smtp):
+    server, _ = smtp
+    dispatcher = MailDispatcher()
+    for i in range(3):
+        dispatcher.enqueue(message(f"user{i}@example.com"))
+
+    stats = await settled(dispatcher, 3)
+    await dispatcher.stop()
+
+    assert server.delivered == [f"user{i}@example.com" for i in range(3)]
+    assert len(server.sessions) == 1
+    assert stats["batches"] == 1 and stats["connects"] == 1
+
+
+async def test_reconnects_after_server_drops_connection(smtp, backoff):
+    server, listener = smtp
+    dispatcher = MailDispatcher()
+    dispatcher.enqueue(message("first@example.com"))
+    await settled(dispatcher, 1)
+
+    listener.restart()
+    dispatcher.enqueue(message("second@example.com"))
+    stats = await settled(dispatcher, 2)
+    await dispatcher.stop()
+
+    assert server.delivered == ["first@example.com", "second@example.com"]
+    assert stats["sent"] == 2 and stats["failed"] == 0
+    assert stats["connects"] == 2
+
+
+async def test_transient_reply_is_retried_with_backoff(smtp, backoff):
+    server, _ = smtp
+    server.data_replies = ["451 Try again later", "421 Busy"]
+    dispatcher = MailDispatcher()
+    dispatcher.enqueue(message("user@example.com"))
+
+    stats = await settled(dispatcher, 1)
+    await dispatcher.stop()
+
+    assert server.delivered == ["user@example.com"]
+    assert stats["retried"] == 2 and stats["sent"] == 1
+    assert backoff == [2, 4]
+
+
+async def test_transient_reply_gives_up_after_max_attempts(smtp, backoff, monkeypatch):
+    server, _ = smtp
+    monkeypatch.setattr(settings, "MAIL_MAX_ATTEMPTS", 2)
+    server.data_replies = ["451 Try again later"] * 2
+    dispatcher = MailDispatcher()
+    dispatcher.enqueue(message("user@example.com"))
+
+    stats = await settled(dispatcher, 1)
+    await dispatcher.stop()
+
+    assert stats["failed"] == 1 and stats["retried"] == 1 and stats["sent"] == 0
+
+
+@pytest.mark.parametrize("reply", ["data", "rcpt"])
+async def test_permanent_rejection_is_failed_without_retry(smtp, backoff, reply):
+    server, _ = smtp
+    if reply == "data":
+        server.data_replies = ["554 Message rejected"]
+    else:
+        server.rcpt_reply = "550 No such user"
+    dispatcher = MailDispatcher()
+    dispatcher.enqueue(message("user@example.com"))
+
+    stats = await settled(dispatcher, 1)
+    await dispatcher.stop()
+
+    assert stats["failed"] == 1 and stats["retried"] == 0
+    assert backoff == []
+    assert server.delivered == []
+
+
+async def test_stop_counts_pending_retries_as_dropped(smtp):
+    server, _ = smtp
+    server.data_replies = ["451 Try again later"]
+    dispatcher = MailDispatcher()
+    dispatcher.enqueue(message("user@example.com"))
+    for _ in range(200):
+        if dispatcher.stats()["retry_pending"]:
+            break
+        await asyncio.sleep(0.02)
+
+    await dispatcher.stop()
+
+    stats = dispatcher.stats()
+    assert stats["dropped"] == 1 and stats["retry_pending"] == 0
+    assert stats["sent"] == 0 and server.delivered == []
@@ -0,0 +1,92 @@
+import json
+import struct
+import pytest
+from utils.glb import CHUNK_BIN, CHUNK_JSON, GLBError, GLBInspector
+
+POSITION = {"bufferView": 0, "componentType": 5126, "count": 6, "type": "VEC3",
+            "min": [-1, -2, -3], "max": [1, 2, 3]}
+
+
+def make_gltf(**values):
+    gltf = {
+        "asset": {"version": "2.0"},
+        "bufferViews": [{"buffer": 0, "byteLength": 72}, {"buffer": 0, "byteLength": 8}],
+        "accessors": [POSITION],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}}]}],
+        "images": [{"bufferView": 1, "mimeType": "image/png"}],
+        "nodes": [{"mesh": 0}],
+    }
+    gltf.update(values)
+    return gltf
+
+
+def make_glb(gltf=None, bin_data=b"\0" * 80):
+    body = json.dumps(make_gltf() if gltf is None else gltf).encode()
+    body += b" " * (-len(body) % 4)
+    length = 12 + 8 + len(body) + 8 + len(bin_data)
+    return (
+        struct.pack("<4sII", b"glTF", 2, length)
+        + struct.pack("<II", len(body), CHUNK_JSON) + body
+        + struct.pack("<II", len(bin_data), CHUNK_BIN) + bin_data
+    )
+
+
+def inspect(data, chunk_size=None):
+    inspector = GLBInspector()
+    chunk_size = chunk_size or len(data)
+    for offset in range(0, len(data), chunk_size):
+        inspector.update(data[offset:offset + chunk_size])
+    return inspector.finish()
+
+
+def test_summary_of_whole_file():
+    summary = inspect(make_glb())
+
+    assert summary["mesh_count"] == 1
+    assert summary["vertex_count"] == 6
+    assert summary["triangle_count"] == 2
+    assert summary["bounds"] == {"min": [-1, -2, -3], "max": [1, 2, 3]}
+    assert summary["bin_size"] == 80
+    assert summary["embedded_texture_bytes"] == 8
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 20, 64])
+def test_chunked_feeding_matches_whole_file(chunk_size):
+    data = make_glb()
+
+    assert inspect(data, chunk_size) == inspect(data)
+
+
+def test_bad_magic_is_rejected_on_first_bytes():
+    with pytest.raises(GLBError, match="Not a binary glTF"):
+        GLBInspector().update(b"PK\x03\x04")
+
+
+@pytest.mark.parametrize("cut", [10, 30, -4])
+def test_truncated_file_is_rejected(cut):
+    inspector = GLBInspector()
+    inspector.update(make_glb()[:cut])
+
+    with pytest.raises(GLBError):
+        inspector.finish()
+
+
+def test_trailing_bytes_are_rejected():
+    with pytest.raises(GLBError, match="longer"):
+        GLBInspector().update(make_glb() + b"\0" * 4)
+
+
+@pytest.mark.parametrize("values", [
+    {"meshes": {"a": 1}},
+    {"meshes": ["mesh"]},
+    {"meshes": [{"primitives": [{"attributes": ["POSITION"]}]}]},
+    {"accessors": [dict(POSITION, count="6")]},
+    {"accessors": [dict(POSITION, min=["a", 0, 0])]},
+    {"meshes": [{"primitives": [{"attributes": {"POSITION": -1}}]}]},
+    {"meshes": [{"primitives": [{"attributes": {"POSITION": 5}}]}]},
+    {"meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": True}]}]},
+    {"images": [{"bufferView": 1.5}]},
+])
+def test_malformed_structure_is_a_glb_error(values):
+    with pytest.raises(GLBError, match="glTF"):
+        inspect(make_glb(make_gltf(**values)))
@@ -0,0 +1,37 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from utils import metrics
+
+pytestmark = pytest.mark.anyio
+
+
+def make_app(release):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        await release.wait()
+        return {"id": item_id}
+
+    app.add_middleware(metrics.MetricsMiddleware)
+    return app
+
+
+async def test_in_flight_requests_are_labelled_by_route():
+    release = asyncio.Event()
+    transport = httpx.ASGITransport(app=make_app(release))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        requests = [asyncio.create_task(client.get(f"/items/{i}")) for i in range(3)]
+        for _ in range(100):
+            if metrics.http_in_flight.callback().get(("GET", "/items/{item_id}")) == 3:
+                break
+            await asyncio.sleep(0.01)
+
+        rendered = metrics.render()
+        assert 'xplor_http_requests_in_flight{method="GET",route="/items/{item_id}"} 3' in rendered
+
+        release.set()
+        assert [r.status_code for r in await asyncio.gather(*requests)] == [200] * 3
+        assert ("GET", "/items/{item_id}") not in metrics.http_in_flight.callback()
@@ -0,0 +1,53 @@
+import json
+import pytest
+from fastapi import HTTPException, Request, Response
+from utils.exception_handlers import http_exception_handler
+from utils.rate_limit import MemoryBucketBackend, RateLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+def make_request():
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": [], "state": {}})
+
+
+async def test_headers_follow_the_limit_closest_to_exhaustion():
+    limiter = RateLimiter(MemoryBucketBackend(100))
+    request, response = make_request(), Response()
+
+    await limiter.hit("login:ip", "10/60", "1.2.3.4", request, response)
+    await limiter.hit("login:email", "2/60", "a@b.co", request, response)
+    await limiter.hit("other", "5/60", "x", request, response)
+
+    assert response.headers["X-RateLimit-Limit"] == "2"
+    assert response.headers["X-RateLimit-Remaining"] == "1"
+    assert request.state.rate_limit_headers["X-RateLimit-Remaining"] == "1"
+
+
+async def test_rejection_raises_429_with_retry_after():
+    limiter = RateLimiter(MemoryBucketBackend(100))
+    request = make_request()
+    await limiter.hit("login:email", "1/60", "a@b.co", request)
+
+    with pytest.raises(HTTPException) as error:
+        await limiter.hit("login:email", "1/60", "a@b.co", request)
+
+    assert error.value.status_code == 429
+    assert error.value.headers["X-RateLimit-Remaining"] == "0"
+    assert int(error.value.headers["Retry-After"]) > 0
+    assert limiter.stats() == {"allowed": 1, "rejected": 1}
+
+
+async def test_error_responses_keep_rate_limit_headers():
+    limiter = RateLimiter(MemoryBucketBackend(100))
+    request = make_request()
+    await limiter.hit("login:email", "5/60", "a@b.co", request)
+
+    response = await http_exception_handler(
+        request, HTTPException(401, "Incorrect email or password", {"WWW-Authenticate": "Bearer"})
+    )
+
+    assert response.status_code == 401
+    assert response.headers["X-RateLimit-Remaining"] == "4"
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+    assert json.loads(response.body)["message"] == "Incorrect email or password"
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+import pytest
+from pymongo.errors import DuplicateKeyError
+from models.user_model import UserInDB
+from repositories.user_repository import user_repository
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "ananya@example.com"
+
+
+def make_user(**values):
+    return UserInDB(email=EMAIL, hashed_password="hash", **values).model_dump()
+
+
+def later(minutes=10):
+    return datetime.utcnow() + timedelta(minutes=minutes)
+
+
+async def test_create_rejects_duplicate_email(db):
+    await user_repository.create(make_user())
+
+    with pytest.raises(DuplicateKeyError):
+        await user_repository.create(make_user())
+    assert await user_repository.exists(EMAIL)
+    assert not await user_repository.exists("nobody@example.com")
+
+
+async def test_get_auth_cached_returns_user_and_token_version(db):
+    assert await user_repository.get_auth_cached(EMAIL) is None
+
+    await user_repository.create(make_user(full_name="Ananya", is_verified=True))
+
+    user, token_version = await user_repository.get_auth_cached(EMAIL)
+    assert user.full_name == "Ananya"
+    assert user.is_verified
+    assert token_version == 0
+
+
+async def test_update_by_email_revokes_tokens_and_invalidates_cache(db):
+    await user_repository.create(make_user())
+    await user_repository.get_auth_cached(EMAIL)
+
+    await user_repository.update_by_email(EMAIL, {"is_active": False}, revoke_tokens=True)
+
+    user, token_version = await user_repository.get_auth_cached(EMAIL)
+    assert not user.is_active
+    assert token_version == 1
+
+
+async def test_consume_verification_otp(db):
+    await user_repository.create(make_user(
+        verification_otp_hash="good", verification_otp_expires_at=later()
+    ))
+
+    assert not await user_repository.consume_verification_otp(EMAIL, "wrong")
+    assert await user_repository.consume_verification_otp(EMAIL, "good")
+    # Consumed: the same OTP cannot verify twice
+    assert not await user_repository.consume_verification_otp(EMAIL, "good")
+
+    user = await user_repository.get_by_email(EMAIL)
+    assert user["is_verified"]
+    assert "verification_otp_hash" not in user
+
+
+async def test_consume_verification_otp_rejects_expired(db):
+    await user_repository.create(make_user(
+        verification_otp_hash="good", verification_otp_expires_at=later(-1)
+    ))
+    assert not await user_repository.consume_verification_otp(EMAIL, "good")
+
+
+async def test_set_reset_otp_skips_google_accounts(db):
+    await user_repository.create(make_user(provider="google"))
+    assert not await user_repository.set_reset_otp(EMAIL, "otp", later())
+    assert not await user_repository.set_reset_otp("nobody@example.com", "otp", later())
+
+
+async def test_reset_password_consumes_otp_and_revokes_tokens(db):
+    await user_repository.create(make_user())
+    assert await user_repository.set_reset_otp(EMAIL, "otp", later())
+
+    assert await user_repository.has_valid_reset_otp(EMAIL, "otp")
+    assert not await user_repository.has_valid_reset_otp(EMAIL, "wrong")
+    assert await user_repository.reset_password(EMAIL, "otp", "new-hash")
+    assert not await user_repository.reset_password(EMAIL, "otp", "other-hash")
+    assert not await user_repository.has_valid_reset_otp(EMAIL, "otp")
+
+    user = await user_repository.get_by_email(EMAIL)
+    assert user["hashed_password"] == "new-hash"
+    assert user["token_version"] == 1
+
+
+async def test_reset_password_rejects_expired_otp(db):
+    await user_repository.create(make_user())
+    await user_repository.set_reset_otp(EMAIL, "otp", later(-1))
+
+    assert not await user_repository.has_valid_reset_otp(EMAIL, "otp")
+    assert not await user_repository.reset_password(EMAIL, "otp", "new-hash")
+
+
+async def test_migrate_legacy_otps_expires_stranded_accounts(db):
+    await db["users"].insert_many([
+        {"email": "old@example.com", "is_verified": False, "verification_otp": "123456"},
+        {"email": "reset@example.com", "is_verified": True, "reset_otp": "654321"},
+        make_user(verification_otp_hash="hash", verification_otp_expires_at=later()),
+    ])
+
+    assert await user_repository.migrate_legacy_otps() == (1, 2)
+
+    # Already expired, so the TTL index may have purged it by now
+    old = await user_repository.get_by_email("old@example.com")
+    assert old is None or (
+        "verification_otp" not in old and old["verification_otp_expires_at"] <= datetime.utcnow()
+    )
+    assert "reset_otp" not in await user_repository.get_by_email("reset@example.com")
+    assert (await user_repository.get_by_email(EMAIL))["verification_otp_expires_at"] > datetime.utcnow()
+    assert await user_repository.migrate_legacy_otps() == (0, 0)
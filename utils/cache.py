@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import pickle
+import time
+from collections import OrderedDict
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class CacheBackend:
+    """Storage interface for ReadThroughCache. Values must be treated as read-only."""
+
+    evictions = 0
+
+    async def get(self, key: str):
+        raise NotImplementedError
+
+    async def set(self, key: str, value, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    def __len__(self):
+        return 0
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU cache with a TTL per entry and a fixed entry budget."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend so every worker sees the same entries and invalidations."""
+
+    def __init__(self, url: str, prefix: str):
+        import redis.asyncio as redis  # optional dependency
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str):
+        raw = await self._redis.get(self.prefix + key)
+        return MISSING if raw is None else pickle.loads(raw)
+
+    async def set(self, key: str, value, ttl: float):
+        await self._redis.set(self.prefix + key, pickle.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, key: str):
+        await self._redis.delete(self.prefix + key)
+
+
+def create_cache_backend(name: str, max_entries: int) -> CacheBackend:
+    """Builds the backend selected by settings.CACHE_BACKEND."""
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.CACHE_REDIS_URL, prefix=f"xplor:{name}:")
+    return MemoryCacheBackend(max_entries)
+
+
+def _retrieve_exception(task):
+    # Marks a failed load as retrieved when every caller had gone away
+    if not task.cancelled():
+        task.exception()
+
+
+class ReadThroughCache:
+    """
+    Read-through cache in front of an async loader.
+
+    Concurrent misses for the same key are coalesced (single-flight): the
+    loader runs once, in a task of its own, and every caller awaits its
+    result. A load that is invalidated while in flight is returned to its
+    callers but not stored.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend, ttl: float):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def get_or_load(self, key: str, loader):
+        value = await self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # The load runs in its own task so cancelling whichever caller
+            # started it (e.g. a client disconnect) does not fail the others
+            task = asyncio.create_task(self._load(key, loader))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader):
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+            if value is not None and self._inflight.get(key) is task:
+                await self.backend.set(key, value, self.ttl)
+            return value
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    async def invalidate(self, key: str):
+        self._inflight.pop(key, None)
+        try:
+            await self.backend.delete(key)
+        except Exception as e:
+            logger.error("Failed to invalidate %s cache key %s: %s", self.name, key, e)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.backend.evictions,
+            "size": len(self.backend),
+        }
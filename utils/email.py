@@ -1,74 +1,226 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from core.config import settings
-from starlette.requests import Request
+from email.message import EmailMessage
 import asyncio
+import logging
+import ssl
+import aiosmtplib
+from core.config import settings
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.SMTP_USERNAME or "",
-    MAIL_PASSWORD=settings.SMTP_PASSWORD or "",
-    MAIL_FROM=settings.SMTP_FROM_EMAIL,
-    MAIL_PORT=settings.SMTP_PORT,
-    MAIL_SERVER=settings.SMTP_SERVER,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=False # Set to True in production with proper certs
-)
+logger = logging.getLogger(__name__)
 
-async def send_verification_email(email_to: str, otp: str):
+
+class MailDispatcher:
     """
-    Sends a verification email with OTP using fastapi-mail (Async).
-    If SMTP settings are not configured properly, it prints the OTP to the console.
+    Background sender for outbound mail.
+
+    Handlers enqueue messages and return immediately. A single worker drains
+    the queue in batches over one persistent SMTP connection, reconnecting
+    when the server drops it and closing it after SMTP_IDLE_TIMEOUT_SECONDS
+    without traffic. Transient failures are retried with exponential backoff;
+    5xx replies and refused recipients are treated as permanent; retries
+    still pending when the dispatcher stops are counted as dropped.
     """
-    
-    subject = "Your Verification OTP for Xplor"
-    body = f"Your verification code is: {otp}"
-    
+
+    def __init__(self):
+        self._queue = None
+        self._worker = None
+        self._smtp = None
+        self._retry_handles = set()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.connects = 0
+        self.batches = 0
+
+    def start(self):
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.MAIL_QUEUE_MAX_SIZE)
+        self._worker = asyncio.create_task(self._run())
+        logger.info("Mail dispatcher started.")
+
+    async def stop(self, timeout: float = 10):
+        """Flushes queued mail (up to timeout) and closes the connection."""
+        if self._worker is None:
+            return
+        if self._retry_handles:
+            # Retries still waiting on their backoff will never be sent
+            self.dropped += len(self._retry_handles)
+            logger.warning("Mail dispatcher stopped with %s retries pending, dropping them", len(self._retry_handles))
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Mail dispatcher stopped with %s messages unsent", self._queue.qsize())
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        await self._disconnect()
+
+    def enqueue(self, message: EmailMessage, attempt: int = 0):
+        if self._worker is None:
+            self.start()
+        try:
+            self._queue.put_nowait((message, attempt))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error("Mail queue full, dropping message to %s", message['To'])
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue_depth(),
+            "retry_pending": len(self._retry_handles),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "connects": self.connects,
+            "batches": self.batches,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                item = await asyncio.wait_for(
+                    self._queue.get(), settings.SMTP_IDLE_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                await self._disconnect()
+                continue
+
+            batch = [item]
+            while len(batch) < settings.MAIL_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._send_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send_batch(self, batch):
+        self.batches += 1
+        for message, attempt in batch:
+            try:
+                smtp = await self._connection()
+                await smtp.send_message(message)
+                self.sent += 1
+            except aiosmtplib.SMTPResponseException as e:
+                if 500 <= e.code < 600:
+                    self.failed += 1
+                    logger.error("Mail to %s rejected permanently: %s", message['To'], e)
+                else:
+                    self._retry(message, attempt, e)
+            except aiosmtplib.SMTPRecipientsRefused as e:
+                # Every recipient was rejected; resending cannot succeed
+                self.failed += 1
+                logger.error("Mail to %s refused by the server: %s", message['To'], e)
+            except (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError) as e:
+                # The connection is suspect; the next message reconnects
+                await self._disconnect()
+                self._retry(message, attempt, e)
+
+    def _retry(self, message, attempt, error):
+        attempt += 1
+        if attempt >= settings.MAIL_MAX_ATTEMPTS:
+            self.failed += 1
+            logger.error("Giving up on mail to %s after %s attempts: %s", message['To'], attempt, error)
+            return
+        self.retried += 1
+        delay = self._retry_delay(attempt)
+        logger.warning("Mail to %s failed (attempt %s), retrying in %ss: %s", message['To'], attempt, delay, error)
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            self.enqueue(message, attempt)
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        """Exponential backoff in seconds, capped at a minute."""
+        return min(2 ** attempt, 60)
+
+    async def _connection(self):
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+
+        tls_context = None
+        if settings.SMTP_STARTTLS and not settings.SMTP_VALIDATE_CERTS:
+            tls_context = ssl.create_default_context()
+            tls_context.check_hostname = False
+            tls_context.verify_mode = ssl.CERT_NONE
+
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.SMTP_SERVER,
+            port=settings.SMTP_PORT,
+            start_tls=settings.SMTP_STARTTLS,
+            tls_context=tls_context,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+        )
+        await smtp.connect()
+        self.connects += 1
+        if settings.SMTP_USERNAME and settings.SMTP_PASSWORD:
+            await smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        self._smtp = smtp
+        return smtp
+
+    async def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+mail_dispatcher = MailDispatcher()
+
+
+def _mail_configured() -> bool:
+    if not settings.SMTP_SERVER:
+        return False
+    return not settings.SMTP_AUTH or bool(settings.SMTP_USERNAME and settings.SMTP_PASSWORD)
+
+
+async def _queue_mail(email_to: str, subject: str, body: str):
     # Check if SMTP settings are present
-    if not settings.SMTP_USERNAME or not settings.SMTP_PASSWORD:
+    if not _mail_configured():
         print(f"\n[MOCK EMAIL] To: {email_to}")
         print(f"[MOCK EMAIL] Subject: {subject}")
         print(f"[MOCK EMAIL] Body: {body}\n")
         return
 
-    message = MessageSchema(
-        subject=subject,
-        recipients=[email_to],
-        body=body,
-        subtype=MessageType.plain
-    )
+    message = EmailMessage()
+    message["From"] = settings.SMTP_FROM_EMAIL
+    message["To"] = email_to
+    message["Subject"] = subject
+    message.set_content(body)
+    mail_dispatcher.enqueue(message)
 
-    fm = FastMail(conf)
-    try:
-        await fm.send_message(message)
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+async def send_verification_email(email_to: str, otp: str):
+    """
+    Queues a verification email with OTP on the background dispatcher.
+    If SMTP settings are not configured properly, it prints the OTP to the console.
+    """
+    subject = "Your Verification OTP for Xplor"
+    body = f"Your verification code is: {otp}"
+    await _queue_mail(email_to, subject, body)
 
 async def send_reset_password_email(email_to: str, otp: str):
     """
-    Sends a password reset email with OTP using fastapi-mail (Async).
+    Queues a password reset email with OTP on the background dispatcher.
     If SMTP settings are not configured properly, it prints the OTP to the console.
     """
-    
     subject = "Password Reset Request for Xplor"
     body = f"Your password reset code is: {otp}\n\nIf you did not request this, please ignore this email."
-    
-    # Check if SMTP settings are present
-    if not settings.SMTP_USERNAME or not settings.SMTP_PASSWORD:
-        print(f"\n[MOCK EMAIL] To: {email_to}")
-        print(f"[MOCK EMAIL] Subject: {subject}")
-        print(f"[MOCK EMAIL] Body: {body}\n")
-        return
-
-    message = MessageSchema(
-        subject=subject,
-        recipients=[email_to],
-        body=body,
-        subtype=MessageType.plain
-    )
-
-    fm = FastMail(conf)
-    try:
-        await fm.send_message(message)
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+    await _queue_mail(email_to, subject, body)
@@ -3,7 +3,7 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
-import traceback
+from core.logging_config import request_id_var
 
 logger = logging.getLogger(__name__)
 
@@ -11,28 +11,34 @@ async def global_exception_handler(request: Request, exc: Exception):
     """
     Catches all unhandled exceptions to prevent server crashes.
     """
-    logger.error(f"Global Exception: {str(exc)}")
-    logger.error(traceback.format_exc())
+    # The traceback is formatted by the log listener thread, not here
+    logger.error("Global Exception on %s %s: %s", request.method, request.url.path, exc, exc_info=exc)
     
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "status": "error",
             "message": "Internal Server Error",
-            "detail": str(exc) # In production, you might want to hide this
+            "detail": str(exc), # In production, you might want to hide this
+            "request_id": request_id_var.get(),
         },
     )
 
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """
     Custom handler for HTTP exceptions to ensure consistent JSON format.
+    Rate-limit headers recorded for the request are kept on the error.
     """
+    headers = getattr(request.state, "rate_limit_headers", None)
+    if headers or getattr(exc, "headers", None):
+        headers = {**(headers or {}), **(getattr(exc, "headers", None) or {})}
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "status": "error",
             "message": exc.detail,
         },
+        headers=headers,
     )
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
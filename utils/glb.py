@@ -0,0 +1,211 @@
+import json
+import struct
+from core.config import settings
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+HEADER_SIZE = 12
+CHUNK_HEADER_SIZE = 8
+TRIANGLES = 4
+
+
+class GLBError(ValueError):
+    """Raised as soon as the streamed bytes cannot be a valid GLB file."""
+
+
+class GLBInspector:
+    """
+    Incremental GLB (binary glTF 2.0) parser fed with the upload stream.
+
+    Only the 12-byte header, the JSON chunk and the BIN chunk header are kept
+    in memory; binary payload bytes are just counted. Call `update()` with
+    every chunk as it arrives and `finish()` once the stream ends to get the
+    geometry summary stored on the asset.
+    """
+
+    def __init__(self, max_json_size: int = None):
+        self.max_json_size = max_json_size or settings.GLB_MAX_JSON_BYTES
+        self.received = 0
+        self.length = None
+        self.json_length = None
+        self.bin_length = None
+        self.gltf = None
+        self._head = bytearray()
+        self._json = bytearray()
+        self._bin_head = bytearray()
+
+    def update(self, data: bytes):
+        start = self.received
+        self.received += len(data)
+
+        # File header + JSON chunk header
+        head_end = HEADER_SIZE + CHUNK_HEADER_SIZE
+        if start < head_end:
+            self._head += data[:head_end - start]
+            if len(self._head) >= 4 and self._head[:4] != GLB_MAGIC:
+                raise GLBError("Not a binary glTF (.glb) file")
+            if len(self._head) == head_end:
+                self._parse_head()
+
+        if self.json_length is None:
+            return
+
+        # JSON chunk body
+        json_end = head_end + self.json_length
+        if start < json_end and self.received > head_end:
+            offset = max(head_end - start, 0)
+            self._json += data[offset:offset + json_end - max(start, head_end)]
+            if len(self._json) == self.json_length:
+                self._parse_json()
+
+        # Optional BIN chunk header
+        bin_head_end = json_end + CHUNK_HEADER_SIZE
+        if json_end < self.length and start < bin_head_end and self.received > json_end:
+            offset = max(json_end - start, 0)
+            self._bin_head += data[offset:offset + bin_head_end - max(start, json_end)]
+            if len(self._bin_head) == CHUNK_HEADER_SIZE:
+                self.bin_length, chunk_type = struct.unpack("<II", self._bin_head)
+                if chunk_type != CHUNK_BIN:
+                    raise GLBError("Second chunk must be BIN")
+
+        if self.received > self.length:
+            raise GLBError("File is longer than its GLB header declares")
+
+    def finish(self) -> dict:
+        """Validates that the whole file arrived and returns the geometry summary."""
+        if self.length is None or self.gltf is None:
+            raise GLBError("File ended before the GLB JSON chunk was complete")
+        if self.received != self.length:
+            raise GLBError("File is shorter than its GLB header declares")
+        try:
+            return self._summarize()
+        except GLBError:
+            raise
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+            raise GLBError(f"Invalid glTF structure: {e}")
+
+    def _parse_head(self):
+        _, version, self.length = struct.unpack_from("<4sII", self._head, 0)
+        json_length, chunk_type = struct.unpack_from("<II", self._head, HEADER_SIZE)
+        if version != 2:
+            raise GLBError(f"Unsupported glTF version {version}")
+        if chunk_type != CHUNK_JSON:
+            raise GLBError("First chunk must be JSON")
+        if json_length > self.max_json_size:
+            raise GLBError("GLB JSON chunk is too large")
+        if HEADER_SIZE + CHUNK_HEADER_SIZE + json_length > self.length:
+            raise GLBError("GLB JSON chunk exceeds the declared file length")
+        self.json_length = json_length
+
+    def _parse_json(self):
+        try:
+            self.gltf = json.loads(bytes(self._json))
+        except ValueError as e:
+            raise GLBError(f"GLB JSON chunk is not valid JSON: {e}")
+        if not isinstance(self.gltf, dict):
+            raise GLBError("GLB JSON chunk must be an object")
+        self._json = bytearray()
+
+    def _summarize(self) -> dict:
+        gltf = self.gltf
+        accessors = _array(gltf, "accessors")
+        buffer_views = _array(gltf, "bufferViews")
+        meshes = _array(gltf, "meshes")
+
+        primitive_count = vertex_count = triangle_count = 0
+        bounds_min, bounds_max = None, None
+        for mesh in meshes:
+            for primitive in _array(_object(mesh, "mesh"), "primitives"):
+                primitive = _object(primitive, "primitive")
+                primitive_count += 1
+                attributes = _object(primitive.get("attributes", {}), "primitive attributes")
+                position = attributes.get("POSITION")
+                if position is None:
+                    continue
+                accessor = _item(accessors, position, "accessor")
+                vertex_count += _count(accessor)
+
+                if primitive.get("mode", TRIANGLES) == TRIANGLES:
+                    indices = primitive.get("indices")
+                    count = _count(_item(accessors, indices, "accessor")) if indices is not None else _count(accessor)
+                    triangle_count += count // 3
+
+                if "min" in accessor and "max" in accessor:
+                    accessor_min, accessor_max = _bound(accessor, "min"), _bound(accessor, "max")
+                    if bounds_min is None:
+                        bounds_min, bounds_max = accessor_min, accessor_max
+                    else:
+                        bounds_min = [min(a, b) for a, b in zip(bounds_min, accessor_min)]
+                        bounds_max = [max(a, b) for a, b in zip(bounds_max, accessor_max)]
+
+        textures = []
+        for index, image in enumerate(_array(gltf, "images")):
+            image = _object(image, "image")
+            if "bufferView" in image:
+                buffer_view = _item(buffer_views, image["bufferView"], "bufferView")
+                textures.append({
+                    "index": index,
+                    "mime_type": image.get("mimeType"),
+                    "byte_length": _non_negative_int(buffer_view.get("byteLength"), "bufferView byteLength"),
+                })
+
+        return {
+            "mesh_count": len(meshes),
+            "primitive_count": primitive_count,
+            "material_count": len(_array(gltf, "materials")),
+            "texture_count": len(_array(gltf, "textures")),
+            "image_count": len(_array(gltf, "images")),
+            "node_count": len(_array(gltf, "nodes")),
+            "animation_count": len(_array(gltf, "animations")),
+            "vertex_count": vertex_count,
+            "triangle_count": triangle_count,
+            "bounds": {"min": bounds_min, "max": bounds_max} if bounds_min is not None else None,
+            "file_size": self.length,
+            "json_size": self.json_length,
+            "bin_size": self.bin_length or 0,
+            "embedded_textures": textures,
+            "embedded_texture_bytes": sum(t["byte_length"] for t in textures),
+        }
+
+
+# Shape checks for the parts of the glTF JSON the summary reads; a client
+# controls this document, so anything unexpected is a GLBError (400)
+
+def _array(parent: dict, key: str) -> list:
+    value = parent.get(key, [])
+    if not isinstance(value, list):
+        raise GLBError(f"glTF '{key}' must be an array")
+    return value
+
+
+def _object(value, name: str) -> dict:
+    if not isinstance(value, dict):
+        raise GLBError(f"glTF {name} must be an object")
+    return value
+
+
+def _non_negative_int(value, name: str) -> int:
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise GLBError(f"glTF {name} must be a non-negative integer, got {value!r}")
+    return value
+
+
+def _item(items: list, index, name: str) -> dict:
+    index = _non_negative_int(index, f"{name} index")
+    if index >= len(items):
+        raise GLBError(f"glTF {name} index {index} is out of range")
+    return _object(items[index], name)
+
+
+def _count(accessor: dict) -> int:
+    return _non_negative_int(accessor.get("count"), "accessor count")
+
+
+def _bound(accessor: dict, key: str) -> list:
+    value = accessor[key]
+    if not isinstance(value, list) or not all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) for v in value
+    ):
+        raise GLBError(f"glTF accessor '{key}' must be an array of numbers")
+    return list(value)
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from core import aws_client, database
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyMonitor:
+    """
+    Checks MongoDB (ping) and S3 (head_bucket) on a background interval and
+    keeps the last result, so readiness probes are answered from memory and
+    never add load to the backends. A result older than three intervals
+    counts as not ready, in case the refresher itself stalls.
+    """
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self._task = None
+        self._s3_probe = None
+        self._checks = {}
+        self._checked_at = None
+        self._checked_at_wall = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Dependency check failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        mongo, s3 = await asyncio.gather(self._check_mongo(), self._check_s3())
+        checks = {"mongo": mongo, "s3": s3}
+        for name, check in checks.items():
+            previous = self._checks.get(name, {}).get("ok")
+            if previous is not None and previous != check["ok"]:
+                if check["ok"]:
+                    logger.info("Dependency %s recovered", name)
+                else:
+                    logger.warning("Dependency %s is down: %s", name, check['error'])
+        self._checks = checks
+        self._checked_at = time.monotonic()
+        self._checked_at_wall = datetime.utcnow()
+
+    async def _timed(self, probe):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe, self.timeout)
+            return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    async def _check_mongo(self):
+        if database.client is None:
+            return {"ok": False, "error": "client not initialized"}
+        return await self._timed(database.client.admin.command("ping"))
+
+    async def _check_s3(self):
+        if aws_client.s3 is None:
+            return {"ok": False, "error": "client not initialized"}
+        # A worker thread cannot be cancelled; don't stack probes behind a hung one
+        if self._s3_probe is not None and not self._s3_probe.done():
+            return {"ok": False, "error": "previous check still running"}
+        self._s3_probe = asyncio.ensure_future(
+            run_in_threadpool(aws_client.s3.head_bucket, Bucket=settings.S3_BUCKET)
+        )
+        return await self._timed(asyncio.shield(self._s3_probe))
+
+    def snapshot(self) -> dict:
+        if self._checked_at is None:
+            return {"status": "starting", "checks": {}}
+        age = time.monotonic() - self._checked_at
+        ready = all(check["ok"] for check in self._checks.values()) and age < 3 * self.interval
+        return {
+            "status": "ready" if ready else "unavailable",
+            "checked_at": self._checked_at_wall.isoformat(),
+            "age_seconds": round(age, 3),
+            "checks": self._checks,
+        }
+
+
+dependency_monitor = DependencyMonitor(
+    settings.HEALTH_CHECK_INTERVAL_SECONDS, settings.HEALTH_CHECK_TIMEOUT_SECONDS
+)
@@ -0,0 +1,55 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag derived from the given validator parts."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: datetime = None) -> dict:
+    # no-cache: clients may store the response but must revalidate each time
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime = None) -> bool:
+    """
+    Evaluates If-None-Match (weak comparison) and, only when it is absent,
+    If-Modified-Since at one-second resolution.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified_response(etag: str, last_modified: datetime = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from uuid import uuid4
+from fastapi import HTTPException, Request, Response
+from core.config import settings
+from repositories.idempotency_repository import idempotency_repository
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class IdempotencyClaim:
+    record_id: str
+    owner: str
+
+
+class IdempotencyGuard:
+    """
+    Makes a route safe to retry with an Idempotency-Key header.
+
+    The first request with a key claims it and runs the handler; its
+    response is stored for IDEMPOTENCY_KEY_TTL_SECONDS. A retry gets the
+    stored response without the handler running again. A retry arriving
+    while the original is still running waits for it (woken directly when
+    both are on this worker, otherwise by polling) for up to
+    IDEMPOTENCY_WAIT_SECONDS, then gets 409. Failed requests release the
+    key, so errors are never replayed.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        # Claims held by this worker, set when they complete or are released
+        self._local = {}
+
+    async def begin(self, request: Request):
+        """
+        Returns (claim, None) when the handler should run, and (None, response)
+        when a stored response must be returned instead. The claim is None
+        when the request has no Idempotency-Key.
+        """
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return None, None
+        key = key.strip().strip('"')
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters",
+            )
+
+        record_id = f"{self.scope}:{key}"
+        owner = uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.05
+        while True:
+            claimed, record = await idempotency_repository.claim(
+                record_id, owner,
+                settings.IDEMPOTENCY_LOCK_SECONDS, settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+            )
+            if claimed:
+                self._local[record_id] = asyncio.Event()
+                return IdempotencyClaim(record_id, owner), None
+            if record is None:
+                # Released between our insert and read: try to claim it again
+                continue
+            if record["status"] == "completed":
+                return None, self._replay(record)
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress",
+                    headers={"Retry-After": "5"},
+                )
+            event = self._local.get(record_id)
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, 1.0)
+
+    async def complete(self, claim: IdempotencyClaim, response: Response):
+        """Stores the handler's response for retries."""
+        if claim is None:
+            return
+        try:
+            stored = await idempotency_repository.complete(
+                claim.record_id, claim.owner, response.status_code, bytes(response.body),
+                settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+            )
+            if not stored:
+                logger.warning("Idempotency claim %s was taken over before completing", claim.record_id)
+        except Exception as e:
+            logger.error("Failed to store idempotent response for %s: %s", claim.record_id, e)
+            await self.release(claim)
+        self._wake(claim)
+
+    async def release(self, claim: IdempotencyClaim):
+        """Frees the key after a failure so the client can retry."""
+        if claim is None:
+            return
+        try:
+            await idempotency_repository.release(claim.record_id, claim.owner)
+        except Exception as e:
+            logger.error("Failed to release idempotency key %s: %s", claim.record_id, e)
+        self._wake(claim)
+
+    def _wake(self, claim):
+        event = self._local.pop(claim.record_id, None)
+        if event is not None:
+            event.set()
+
+    @staticmethod
+    def _replay(record):
+        return Response(
+            content=record["body"],
+            status_code=record["status_code"],
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
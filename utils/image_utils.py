@@ -0,0 +1,64 @@
+import io
+
+# Magic-number prefixes of the image types accepted as thumbnails
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+PREVIEW_CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+def sniff_image_type(data: bytes):
+    """Returns the image MIME type from the file's first bytes, or None."""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class ImageTypeSniffer:
+    """Upload observer that fixes the stored content type from the first bytes."""
+
+    def __init__(self, upload):
+        self.upload = upload
+        self._head = b""
+
+    def update(self, data: bytes):
+        if len(self._head) >= 12:
+            return
+        self._head += data[:12 - len(self._head)]
+        content_type = sniff_image_type(self._head)
+        if content_type:
+            self.upload.content_type = content_type
+
+
+def render_previews(data: bytes, sizes: list, formats: list) -> list:
+    """
+    Decodes an image once and encodes a downscaled copy per (size, format).
+    Runs in a worker process, so it only depends on Pillow.
+    Returns [(size, format, encoded_bytes)].
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        source = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = []
+    # Largest first, each size downscaled from the previous one
+    preview = source
+    for size in sorted(sizes, reverse=True):
+        preview = preview.copy()
+        preview.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            frame = preview.convert("RGB") if fmt == "jpeg" else preview
+            buffer = io.BytesIO()
+            frame.save(buffer, format=fmt.upper(), quality=80, optimize=True)
+            variants.append((size, fmt, buffer.getvalue()))
+    return variants
@@ -0,0 +1,382 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Recording is a dict lookup plus a few integer updates, so it stays on in
+production. Values are per worker process; scrape each worker (or run one
+worker per container) to see the whole picture.
+"""
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from pymongo import monitoring
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Updates also come from threadpool threads (botocore hooks), so
+        # read-modify-write is guarded
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, extra, value in self.samples():
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(self.labelnames, labels, extra)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield "", labels, "", value
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) - amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield "", labels, "", value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = [(labels, (list(counts), total)) for labels, (counts, total) in self._series.items()]
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", labels, f'le="{_format_value(bound)}"', cumulative
+            yield "_sum", labels, "", total
+            yield "_count", labels, "", cumulative
+
+
+class CallbackMetric(_Metric):
+    """Reads its values at scrape time from a callback returning {labels: value}."""
+
+    def __init__(self, name, documentation, type, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.callback = callback
+
+    def samples(self):
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.warning("Metric callback %s failed: %s", self.name, e)
+            return
+        for labels, value in values.items():
+            yield "", labels, "", value
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+http_requests = Counter(
+    "xplor_http_requests_total", "HTTP requests handled.", ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "xplor_http_request_duration_seconds", "HTTP request latency, until the response is fully sent.",
+    ("method", "route"),
+)
+# Scopes of the requests being handled, keyed by id(scope). The router adds
+# the matched route to the scope, so the in-flight gauge is labelled by route
+# when it is read at scrape time
+_active_requests = {}
+
+
+def _route_path(scope):
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+def _in_flight_by_route():
+    counts = {}
+    # Copied in one step: scrapes run on a worker thread
+    for scope in list(_active_requests.values()):
+        labels = (scope["method"], _route_path(scope))
+        counts[labels] = counts.get(labels, 0) + 1
+    return counts
+
+
+http_in_flight = CallbackMetric(
+    "xplor_http_requests_in_flight", "HTTP requests currently being handled.", "gauge",
+    _in_flight_by_route, ("method", "route"),
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, status and in-flight
+    requests. The route label is the matched path template, so path
+    parameters never create new series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        _active_requests[id(scope)] = scope
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            del _active_requests[id(scope)]
+            route_path = _route_path(scope)
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], route_path)
+            http_requests.inc(scope["method"], route_path, str(status[0]))
+
+
+# MongoDB
+mongo_command_duration = Histogram(
+    "xplor_mongo_command_duration_seconds", "MongoDB command latency as seen by the driver.",
+    ("command", "outcome"),
+)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo CommandListener; the driver reports each command's duration."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name, "success")
+
+    def failed(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name, "failure")
+
+
+# S3
+s3_call_duration = Histogram(
+    "xplor_s3_call_duration_seconds", "S3 API call latency including retries.",
+    ("operation", "outcome"),
+)
+s3_bytes = Counter(
+    "xplor_s3_bytes_total", "Bytes sent to / received from S3 (per Content-Length).",
+    ("operation", "direction"),
+)
+
+
+def _body_length(body):
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if hasattr(body, "seek") and hasattr(body, "tell"):
+        # Measure the remaining stream without consuming it
+        position = body.tell()
+        body.seek(0, 2)
+        length = body.tell() - position
+        body.seek(position)
+        return length
+    return 0
+
+
+def instrument_s3(client):
+    """Registers botocore event hooks timing every call on this client."""
+
+    def before_call(model, params, context, **kwargs):
+        context["metrics_start"] = time.perf_counter()
+        sent = _body_length(params.get("body"))
+        if sent:
+            s3_bytes.inc(model.name, "sent", amount=sent)
+
+    def after_call(http_response, model, context, **kwargs):
+        start = context.get("metrics_start")
+        if start is not None:
+            outcome = "success" if http_response.status_code < 400 else str(http_response.status_code)
+            s3_call_duration.observe(time.perf_counter() - start, model.name, outcome)
+        length = http_response.headers.get("content-length")
+        if length:
+            s3_bytes.inc(model.name, "received", amount=int(length))
+
+    def after_call_error(model, context, **kwargs):
+        start = context.get("metrics_start")
+        if start is not None:
+            s3_call_duration.observe(time.perf_counter() - start, model.name, "error")
+
+    events = client.meta.events
+    events.register("before-call.s3", before_call)
+    events.register("after-call.s3", after_call)
+    events.register("after-call-error.s3", after_call_error)
+
+
+# Event loop
+event_loop_lag = Gauge(
+    "xplor_event_loop_lag_seconds", "Most recent delay of a timer scheduled on the event loop."
+)
+event_loop_lag_histogram = Histogram(
+    "xplor_event_loop_lag_distribution_seconds", "Event loop timer delays."
+)
+
+
+async def monitor_event_loop_lag(interval: float = None):
+    """Sleeps for interval and records how late the loop woke up."""
+    interval = interval or settings.METRICS_LOOP_LAG_INTERVAL_SECONDS
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        event_loop_lag.set(lag)
+        event_loop_lag_histogram.observe(lag)
+
+
+def register_component_metrics(caches: dict):
+    """
+    Exports the stats() of the given read-through caches and of the worker
+    pools and queues, read at scrape time.
+    """
+    from core.logging_config import stats as logging_stats
+    from utils.email import mail_dispatcher
+    from utils.preview_pipeline import preview_pipeline
+    from utils.rate_limit import rate_limiter
+    from utils.security import password_hasher
+
+    def cache_stat(field):
+        return lambda: {(name, ): cache.stats()[field] for name, cache in caches.items()}
+
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("coalesced", "counter"),
+                        ("evictions", "counter"), ("size", "gauge")):
+        suffix = "_total" if kind == "counter" else ""
+        CallbackMetric(
+            f"xplor_cache_{field}{suffix}", f"Read-through cache {field}.", kind,
+            cache_stat(field), ("cache",),
+        )
+
+    CallbackMetric(
+        "xplor_preview_queue_depth", "Preview jobs waiting for a worker.", "gauge",
+        lambda: {(): preview_pipeline.queue_depth()},
+    )
+
+    for field, kind in (("pending", "gauge"), ("completed", "counter"), ("rejected", "counter"),
+                        ("rehashed", "counter"), ("busy_seconds", "counter")):
+        suffix = "_total" if kind == "counter" else ""
+        CallbackMetric(
+            f"xplor_password_hash_{field}{suffix}", f"Password hashing pool {field.replace('_', ' ')}.",
+            kind, lambda field=field: {(): password_hasher.stats()[field]},
+        )
+
+    for field, kind in (("queued", "gauge"), ("retry_pending", "gauge"), ("sent", "counter"),
+                        ("failed", "counter"), ("retried", "counter"), ("dropped", "counter"),
+                        ("connects", "counter"), ("batches", "counter")):
+        suffix = "_total" if kind == "counter" else ""
+        CallbackMetric(
+            f"xplor_mail_{field}{suffix}", f"Mail dispatcher {field.replace('_', ' ')}.",
+            kind, lambda field=field: {(): mail_dispatcher.stats()[field]},
+        )
+
+    for field, kind in (("queued", "gauge"), ("dropped", "counter"), ("sampled_out", "counter")):
+        suffix = "_total" if kind == "counter" else ""
+        CallbackMetric(
+            f"xplor_log_records_{field}{suffix}", f"Log records {field.replace('_', ' ')}.",
+            kind, lambda field=field: {(): logging_stats()[field]},
+        )
+
+    CallbackMetric(
+        "xplor_rate_limit_decisions_total", "Rate limiter decisions.", "counter",
+        lambda: {(decision,): count for decision, count in rate_limiter.stats().items()},
+        ("decision",),
+    )
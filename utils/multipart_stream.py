@@ -0,0 +1,79 @@
+from fastapi import HTTPException, Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, MultipartState, parse_options_header
+
+MAX_FIELD_SIZE = 1024 * 1024
+
+
+async def stream_multipart_form(request: Request, open_file) -> dict:
+    """
+    Parses a multipart/form-data body as it arrives, without spooling files
+    to disk. For every file part `await open_file(field_name, filename,
+    content_type, fields)` is called, where `fields` holds the plain fields
+    received so far; it must return a sink with an async `write(bytes)`
+    method, or None to skip the part. Returns the plain (non-file) form fields.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+
+    events = []
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": lambda: events.append(("part_begin", b"")),
+        "on_part_data": lambda data, start, end: events.append(("part_data", data[start:end])),
+        "on_header_field": lambda data, start, end: events.append(("header_field", data[start:end])),
+        "on_header_value": lambda data, start, end: events.append(("header_value", data[start:end])),
+        "on_header_end": lambda: events.append(("header_end", b"")),
+        "on_headers_finished": lambda: events.append(("headers_finished", b"")),
+    })
+
+    fields = {}
+    headers, header_field, header_value = {}, b"", b""
+    field_name, field_value, sink, is_file = None, bytearray(), None, False
+
+    async for chunk in request.stream():
+        try:
+            parser.write(chunk)
+        except MultipartParseError as e:
+            raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+
+        for event, data in events:
+            if event == "part_begin":
+                headers, header_field, header_value = {}, b"", b""
+                field_name, field_value, sink, is_file = None, bytearray(), None, False
+            elif event == "header_field":
+                header_field += data
+            elif event == "header_value":
+                header_value += data
+            elif event == "header_end":
+                headers[header_field.lower()] = header_value
+                header_field, header_value = b"", b""
+            elif event == "headers_finished":
+                _, options = parse_options_header(headers.get(b"content-disposition", b""))
+                field_name = options.get(b"name", b"").decode("utf-8")
+                is_file = b"filename" in options
+                if not is_file:
+                    fields[field_name] = ""
+                else:
+                    sink = await open_file(
+                        field_name,
+                        options[b"filename"].decode("utf-8"),
+                        headers.get(b"content-type", b"application/octet-stream").decode("latin-1"),
+                        fields,
+                    )
+            elif event == "part_data":
+                if is_file:
+                    if sink is not None:
+                        await sink.write(data)
+                else:
+                    field_value += data
+                    if len(field_value) > MAX_FIELD_SIZE:
+                        raise HTTPException(status_code=400, detail=f"Form field '{field_name}' is too large")
+                    fields[field_name] = field_value.decode("utf-8", errors="replace")
+
+        events.clear()
+
+    parser.finalize()
+    if parser.state != MultipartState.END:
+        raise HTTPException(status_code=400, detail="Incomplete multipart body")
+    return fields
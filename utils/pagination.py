@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+# Listings are ordered newest first; (uploaded_at, file_id) is unique per asset
+# so it can be used as a stable keyset for cursor pagination.
+ASSET_SORT = [("uploaded_at", -1), ("file_id", -1)]
+
+
+def encode_cursor(doc: dict) -> str:
+    """Builds an opaque cursor pointing just after the given document."""
+    raw = json.dumps([doc["uploaded_at"].isoformat(), doc["file_id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decodes a cursor created by encode_cursor into (uploaded_at, file_id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        uploaded_at, file_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(uploaded_at), str(file_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(cursor: str) -> dict:
+    """Returns the Mongo filter selecting documents after the cursor."""
+    uploaded_at, file_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"uploaded_at": {"$lt": uploaded_at}},
+            {"uploaded_at": uploaded_at, "file_id": {"$lt": file_id}},
+        ]
+    }
+
+
+def parse_projection(fields: str, allowed, required=("file_id", "uploaded_at")) -> dict:
+    """
+    Turns a comma-separated field list into a Mongo projection.
+    Fields in `required` are always returned since the cursor is built from them.
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+
+    projection = {"_id": 0}
+    for field in (*required, *requested):
+        projection[field] = 1
+    return projection
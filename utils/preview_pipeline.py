@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from uuid import uuid4
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
+from repositories.asset_repository import asset_repository
+from repositories.job_repository import job_repository
+from utils.image_utils import PREVIEW_CONTENT_TYPES, render_previews, sniff_image_type
+from utils.s3_utils import delete_many_from_s3, download_from_s3, put_bytes_to_s3
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """A failure that retrying cannot fix, e.g. a thumbnail that is not an image."""
+
+
+class PreviewPipeline:
+    """
+    Background queue that turns an uploaded thumbnail into resized previews.
+
+    Jobs run on PREVIEW_WORKERS asyncio workers; the CPU-bound decoding and
+    resizing happens in a bounded process pool so it never blocks the event
+    loop. Job status lives in the `jobs` collection so any worker can report
+    it, and failed jobs are retried with exponential backoff.
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._pool = None
+        self._workers = []
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        # Spawned (not forked) workers so children never inherit the event
+        # loop, client sockets or threads of the server process
+        self._pool = ProcessPoolExecutor(
+            max_workers=settings.PREVIEW_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(settings.PREVIEW_WORKERS)
+        ]
+        logger.info("Preview pipeline started.")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._queue = None
+
+    async def enqueue(self, file_id: str, thumbnail_key: str) -> str:
+        """Records a queued job and hands it to the workers. Returns the job_id."""
+        job_id = str(uuid4())
+        await job_repository.create({
+            "job_id": job_id,
+            "type": "previews",
+            "file_id": file_id,
+            "status": "queued",
+            "attempts": 0,
+            "error": None,
+        })
+        if self._queue is None:
+            logger.warning("Preview pipeline not running; job %s stays queued", job_id)
+        else:
+            self._queue.put_nowait((job_id, file_id, thumbnail_key, 1))
+        return job_id
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(*job)
+            except Exception as e:
+                logger.error("Preview worker error: %s", e)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id, file_id, thumbnail_key, attempt):
+        await job_repository.update(job_id, {"status": "running", "attempts": attempt})
+        try:
+            previews, content_type = await self._render(file_id, thumbnail_key)
+        except Exception as e:
+            retry = not isinstance(e, PermanentJobError) and attempt < settings.PREVIEW_MAX_ATTEMPTS
+            logger.warning("Preview job %s attempt %s failed: %s", job_id, attempt, e)
+            if retry and self._queue is not None:
+                await job_repository.update(job_id, {"status": "retrying", "error": str(e)})
+                delay = 2 ** attempt
+                asyncio.get_running_loop().call_later(
+                    delay, self._requeue, (job_id, file_id, thumbnail_key, attempt + 1)
+                )
+            else:
+                await self._finish(job_id, "failed", error=str(e))
+            return
+
+        if not await asset_repository.update(
+            file_id, {"previews": previews, "thumbnail_content_type": content_type}
+        ):
+            # The asset was deleted while the job ran; drop the orphans
+            await run_in_threadpool(delete_many_from_s3, [p["key"] for p in previews])
+            await self._finish(job_id, "failed", error="Asset no longer exists")
+            return
+
+        await self._finish(job_id, "succeeded", previews=previews)
+        logger.info("Generated %s previews for file_id: %s", len(previews), file_id)
+
+    async def _render(self, file_id, thumbnail_key):
+        data = await run_in_threadpool(download_from_s3, thumbnail_key)
+        content_type = sniff_image_type(data)
+        if content_type is None:
+            raise PermanentJobError("Thumbnail is not a JPEG, PNG, GIF or WebP image")
+
+        variants = await asyncio.get_running_loop().run_in_executor(
+            self._pool, render_previews, data,
+            settings.PREVIEW_SIZES, settings.PREVIEW_FORMATS,
+        )
+
+        async def store(size, fmt, body):
+            key = f"assets/previews/{file_id}/preview_{size}.{fmt}"
+            url = await run_in_threadpool(put_bytes_to_s3, key, body, PREVIEW_CONTENT_TYPES[fmt])
+            return {
+                "size": size,
+                "format": fmt,
+                "content_type": PREVIEW_CONTENT_TYPES[fmt],
+                "key": key,
+                "url": url,
+                "byte_length": len(body),
+            }
+
+        previews = await asyncio.gather(*(store(*variant) for variant in variants))
+        return list(previews), content_type
+
+    def _requeue(self, job):
+        if self._queue is not None:
+            self._queue.put_nowait(job)
+
+    async def _finish(self, job_id, status, error=None, previews=None):
+        values = {
+            "status": status,
+            "error": error,
+            "finished_at": datetime.utcnow(),
+            "expires_at": datetime.utcnow() + timedelta(days=settings.JOB_RETENTION_DAYS),
+        }
+        if previews is not None:
+            values["previews"] = previews
+        await job_repository.update(job_id, values)
+
+
+preview_pipeline = PreviewPipeline()
@@ -0,0 +1,189 @@
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi import HTTPException, Request, Response, status
+from core.config import settings
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int
+    reset: int
+
+
+def parse_rate(rate: str):
+    """
+    Parses "<capacity>/<seconds>" into (capacity, tokens per second).
+    An empty value disables the limit.
+    """
+    if not rate:
+        return None
+    capacity, period = rate.split("/")
+    return int(capacity), int(capacity) / float(period)
+
+
+def _result(allowed, tokens, capacity, refill_rate, cost):
+    return RateLimitResult(
+        allowed=allowed,
+        limit=capacity,
+        remaining=int(tokens),
+        retry_after=0 if allowed else math.ceil((cost - tokens) / refill_rate),
+        reset=math.ceil((capacity - tokens) / refill_rate),
+    )
+
+
+class MemoryBucketBackend:
+    """
+    Per-process token buckets. Memory is bounded by max_keys (LRU), and a
+    bucket idle long enough to have refilled is dropped, since it is
+    indistinguishable from a new one.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, capacity: int, refill_rate: float, cost: int = 1):
+        now = time.monotonic()
+        tokens, updated, _, _ = self._buckets.get(key, (capacity, now, capacity, refill_rate))
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now, capacity, refill_rate)
+        self._buckets.move_to_end(key)
+        self._expire(now)
+        return _result(allowed, tokens, capacity, refill_rate, cost)
+
+    def _expire(self, now):
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        # Oldest entries first; stop at the first bucket that is still draining
+        while self._buckets:
+            tokens, updated, capacity, refill_rate = next(iter(self._buckets.values()))
+            if tokens + (now - updated) * refill_rate < capacity:
+                break
+            self._buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# Refill, take and set an expiry in one atomic step using the server clock
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketBackend:
+    """Shared buckets so every worker enforces the same limits."""
+
+    def __init__(self, url: str, prefix: str = "xplor:ratelimit:"):
+        import redis.asyncio as redis  # optional dependency
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: int, refill_rate: float, cost: int = 1):
+        allowed, tokens = await self._take(
+            keys=[self.prefix + key], args=[capacity, refill_rate, cost]
+        )
+        return _result(bool(allowed), float(tokens), capacity, refill_rate, cost)
+
+
+def create_bucket_backend():
+    """Builds the backend selected by settings.RATE_LIMIT_BACKEND."""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBucketBackend(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryBucketBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        self.allowed = 0
+        self.rejected = 0
+
+    async def hit(self, name: str, rate: str, key: str, request: Request, response: Response = None):
+        """
+        Takes a token from the `name` bucket for `key`. Raises 429 with
+        Retry-After when empty. Otherwise keeps the X-RateLimit-* headers of
+        whichever limit is closest to exhaustion on request.state, where the
+        HTTP exception handler picks them up for error responses, and sets
+        them on the response.
+        """
+        parsed = parse_rate(rate)
+        if parsed is None:
+            return
+        capacity, refill_rate = parsed
+        result = await self.backend.take(f"{name}:{key}", capacity, refill_rate)
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+            "X-RateLimit-Reset": str(result.reset),
+        }
+        if not result.allowed:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={**headers, "Retry-After": str(result.retry_after)},
+            )
+        self.allowed += 1
+        current = getattr(request.state, "rate_limit_headers", None)
+        if current is None or result.remaining < int(current["X-RateLimit-Remaining"]):
+            request.state.rate_limit_headers = current = headers
+        if response is not None:
+            response.headers.update(current)
+
+    def stats(self) -> dict:
+        return {"allowed": self.allowed, "rejected": self.rejected}
+
+
+rate_limiter = RateLimiter(create_bucket_backend())
+
+
+def client_ip(request: Request) -> str:
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # Entries to the left of those appended by our own proxies are
+            # client-supplied; take the address the outermost trusted proxy saw
+            hops = [hop.strip() for hop in forwarded.split(",")]
+            return hops[-max(1, min(settings.TRUSTED_PROXY_HOPS, len(hops)))]
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(name: str, rate: str):
+    """Dependency enforcing a per-client-IP bucket for a route."""
+
+    async def dependency(request: Request, response: Response):
+        await rate_limiter.hit(f"{name}:ip", rate, client_ip(request), request, response)
+
+    return dependency
+
+
+async def limit_by_email(name: str, rate: str, email: str, request: Request, response: Response):
+    """Per-account bucket, checked in the handler once the email is parsed."""
+    await rate_limiter.hit(f"{name}:email", rate, email.lower(), request, response)
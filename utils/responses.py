@@ -0,0 +1,24 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value):
+    # ObjectId, HttpUrl and other leftovers are rendered as strings
+    return str(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, which serializes dicts, lists and
+    datetimes natively. Used as the app-wide default response class; routes
+    that already hold plain documents return it directly so FastAPI skips
+    jsonable_encoder and response_model validation.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -1,69 +1,464 @@
+import asyncio
 from uuid import uuid4
 from fastapi import HTTPException
-from core.aws_client import s3
+from starlette.concurrency import run_in_threadpool
+from core import aws_client
 from core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# boto3 (and botocore's models) are only imported once S3 is actually used,
+# so importing the app stays fast; see core/aws_client.connect()
+_transfer_config = None
+
+
+def get_transfer_config():
+    global _transfer_config
+    if _transfer_config is None:
+        from boto3.s3.transfer import TransferConfig
+
+        _transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_PART_SIZE,
+            multipart_chunksize=settings.S3_PART_SIZE,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+        )
+    return _transfer_config
+
 
 def check_s3_connection():
-    if s3 is None:
+    if aws_client.s3 is None:
         logger.error("AWS S3 client is not available.")
         raise HTTPException(status_code=503, detail="Storage service unavailable")
 
 
-def upload_to_s3(file, folder: str, content_type: str):
+def build_s3_key(folder: str, file_id: str, filename: str) -> str:
+    return f"{folder}/{file_id}_{filename}"
+
+
+def build_s3_url(file_key: str) -> str:
+    """Returns the object URL, honouring a custom endpoint when configured."""
+    if settings.S3_ENDPOINT_URL:
+        return f"{settings.S3_ENDPOINT_URL.rstrip('/')}/{settings.S3_BUCKET}/{file_key}"
+    return (
+        f"https://{settings.S3_BUCKET}.s3."
+        f"{settings.AWS_REGION}.amazonaws.com/{file_key}"
+    )
+
+
+async def upload_to_s3(file, folder: str, content_type: str):
     """
     Uploads a file to S3 and returns:
     (file_id, file_key, file_url)
+    The transfer runs on a worker thread so the event loop is never blocked.
     """
     check_s3_connection()
 
     try:
         file.file.seek(0)  # Ensure reading from beginning
         file_id = str(uuid4())
-        file_key = f"{folder}/{file_id}_{file.filename}"
+        file_key = build_s3_key(folder, file_id, file.filename)
 
         logger.info(
-            f"Uploading {file.filename} to "
-            f"{settings.S3_BUCKET}/{file_key}"
+            "Uploading %s to %s/%s", file.filename, settings.S3_BUCKET, file_key
         )
 
-        s3.upload_fileobj(
+        await run_in_threadpool(
+            aws_client.s3.upload_fileobj,
             file.file,
             settings.S3_BUCKET,
             file_key,
             ExtraArgs={"ContentType": content_type},
+            Config=get_transfer_config(),
         )
 
-        file_url = (
-            f"https://{settings.S3_BUCKET}.s3."
-            f"{settings.AWS_REGION}.amazonaws.com/{file_key}"
-        )
+        file_url = build_s3_url(file_key)
 
         return file_id, file_key, file_url
 
     except Exception as e:
-        logger.error(f"S3 Upload Error: {e}")
+        logger.error("S3 Upload Error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"S3 upload failed: {str(e)}"
         )
 
 
+def get_s3_object(file_key: str, range_header: str = None, if_none_match: str = None,
+                  if_modified_since=None):
+    """
+    Opens an object for streaming, passing HTTP conditions through to S3.
+    Raises ClientError with code 304/412/416/NoSuchKey for the caller to map.
+    """
+    check_s3_connection()
+    params = {"Bucket": settings.S3_BUCKET, "Key": file_key}
+    if range_header:
+        params["Range"] = range_header
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    if if_modified_since:
+        params["IfModifiedSince"] = if_modified_since
+    return aws_client.s3.get_object(**params)
+
+
+def generate_presigned_download(file_key: str) -> str:
+    """Presigns a GET URL valid for PRESIGNED_URL_EXPIRE_SECONDS."""
+    check_s3_connection()
+    return aws_client.s3.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": settings.S3_BUCKET, "Key": file_key},
+        ExpiresIn=settings.PRESIGNED_URL_EXPIRE_SECONDS,
+    )
+
+
+def download_from_s3(file_key: str) -> bytes:
+    """Reads a (small) object fully into memory."""
+    check_s3_connection()
+    response = aws_client.s3.get_object(Bucket=settings.S3_BUCKET, Key=file_key)
+    return response["Body"].read()
+
+
+def put_bytes_to_s3(file_key: str, body: bytes, content_type: str):
+    """Writes an in-memory object and returns its URL."""
+    check_s3_connection()
+    aws_client.s3.put_object(
+        Bucket=settings.S3_BUCKET,
+        Key=file_key,
+        Body=body,
+        ContentType=content_type,
+    )
+    return build_s3_url(file_key)
+
+
+class S3StreamingUpload:
+    """
+    Streams bytes into an S3 object as they arrive, without a temp file.
+
+    Data is buffered up to one part. Objects smaller than a part are written
+    with a single put_object; larger ones become a multipart upload whose parts
+    are sent concurrently (at most S3_MAX_CONCURRENCY in flight, which also
+    bounds memory) on worker threads. Each observer's `update(bytes)` sees
+    the data in the same pass, e.g. a hash or a file inspector.
+    """
+
+    def __init__(self, file_key: str, content_type: str, part_size: int = None,
+                 max_concurrency: int = None, observers: list = None):
+        check_s3_connection()
+        self.file_key = file_key
+        self.content_type = content_type
+        self.part_size = part_size or settings.S3_PART_SIZE
+        self.size = 0
+        self.observers = observers or []
+        self.completed = False
+        self.discarding = False
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._next_part = 1
+        self._etags = {}
+        self._tasks = []
+        self._slots = asyncio.Semaphore(max_concurrency or settings.S3_MAX_CONCURRENCY)
+
+    async def write(self, data: bytes):
+        for observer in self.observers:
+            observer.update(data)
+        self.size += len(data)
+        if self.discarding:
+            return
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            await self._submit_part(part)
+
+    def discard(self):
+        """
+        Stops sending data to S3 (observers still see it), e.g. when the
+        content is already stored. Only valid before anything was written.
+        """
+        if self.size or self._upload_id is not None:
+            raise RuntimeError("Cannot discard an upload that already received data")
+        self.discarding = True
+
+    async def complete(self):
+        """Flushes the remaining bytes and completes the object."""
+        if self.discarding:
+            raise RuntimeError("Cannot complete a discarded upload")
+        if self._upload_id is None:
+            await run_in_threadpool(
+                aws_client.s3.put_object,
+                Bucket=settings.S3_BUCKET,
+                Key=self.file_key,
+                Body=bytes(self._buffer),
+                ContentType=self.content_type,
+            )
+        else:
+            if self._buffer:
+                await self._submit_part(bytes(self._buffer))
+            await asyncio.gather(*self._tasks)
+            await run_in_threadpool(
+                aws_client.s3.complete_multipart_upload,
+                Bucket=settings.S3_BUCKET,
+                Key=self.file_key,
+                UploadId=self._upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": number, "ETag": etag}
+                        for number, etag in sorted(self._etags.items())
+                    ]
+                },
+            )
+        self._buffer.clear()
+        self.completed = True
+
+    async def abort(self):
+        """Discards everything written so far, including a completed object."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._buffer.clear()
+
+        try:
+            if self.completed:
+                await run_in_threadpool(
+                    aws_client.s3.delete_object, Bucket=settings.S3_BUCKET, Key=self.file_key
+                )
+            elif self._upload_id is not None:
+                await run_in_threadpool(
+                    aws_client.s3.abort_multipart_upload,
+                    Bucket=settings.S3_BUCKET,
+                    Key=self.file_key,
+                    UploadId=self._upload_id,
+                )
+        except Exception as e:
+            logger.error("S3 Abort Error for %s: %s", self.file_key, e)
+
+    async def _submit_part(self, body: bytes):
+        if self._upload_id is None:
+            response = await run_in_threadpool(
+                aws_client.s3.create_multipart_upload,
+                Bucket=settings.S3_BUCKET,
+                Key=self.file_key,
+                ContentType=self.content_type,
+            )
+            self._upload_id = response["UploadId"]
+
+        # Wait for a free slot so only a bounded number of parts are buffered
+        await self._slots.acquire()
+        for task in self._tasks:
+            if task.done() and task.exception():
+                self._slots.release()
+                raise task.exception()
+
+        part_number = self._next_part
+        self._next_part += 1
+        self._tasks.append(asyncio.create_task(self._upload_part(part_number, body)))
+
+    async def _upload_part(self, part_number: int, body: bytes):
+        try:
+            response = await run_in_threadpool(
+                aws_client.s3.upload_part,
+                Bucket=settings.S3_BUCKET,
+                Key=self.file_key,
+                UploadId=self._upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            self._etags[part_number] = response["ETag"]
+        finally:
+            self._slots.release()
+
+
 def delete_from_s3(file_key: str):
     """Deletes an object from S3."""
     check_s3_connection()
 
     try:
-        s3.delete_object(
+        aws_client.s3.delete_object(
             Bucket=settings.S3_BUCKET,
             Key=file_key
         )
     except Exception as e:
-        logger.error(f"S3 Delete Error: {e}")
+        logger.error("S3 Delete Error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"S3 delete failed: {str(e)}"
         )
+
+
+def generate_presigned_upload(file_key: str, content_type: str, method: str = "put"):
+    """
+    Presigns a single-request upload of `file_key` straight to S3.
+    PUT returns a URL plus the headers the client must send; POST returns
+    the form URL and fields for a browser form upload.
+    """
+    check_s3_connection()
+    expires_in = settings.PRESIGNED_URL_EXPIRE_SECONDS
+
+    try:
+        if method == "post":
+            post = aws_client.s3.generate_presigned_post(
+                Bucket=settings.S3_BUCKET,
+                Key=file_key,
+                Fields={"Content-Type": content_type},
+                Conditions=[{"Content-Type": content_type}],
+                ExpiresIn=expires_in,
+            )
+            return {
+                "key": file_key,
+                "method": "POST",
+                "url": post["url"],
+                "fields": post["fields"],
+            }
+
+        url = aws_client.s3.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": settings.S3_BUCKET,
+                "Key": file_key,
+                "ContentType": content_type,
+            },
+            ExpiresIn=expires_in,
+        )
+        return {
+            "key": file_key,
+            "method": "PUT",
+            "url": url,
+            "headers": {"Content-Type": content_type},
+        }
+
+    except Exception as e:
+        logger.error("S3 Presign Error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"S3 presign failed: {str(e)}"
+        )
+
+
+def generate_presigned_multipart_upload(file_key: str, content_type: str, part_count: int):
+    """
+    Starts a multipart upload and presigns one PUT URL per part.
+    The client uploads the parts and passes their ETags to finalize.
+    """
+    check_s3_connection()
+
+    try:
+        upload_id = aws_client.s3.create_multipart_upload(
+            Bucket=settings.S3_BUCKET,
+            Key=file_key,
+            ContentType=content_type,
+        )["UploadId"]
+
+        parts = [
+            {
+                "part_number": part_number,
+                "url": aws_client.s3.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": settings.S3_BUCKET,
+                        "Key": file_key,
+                        "UploadId": upload_id,
+                        "PartNumber": part_number,
+                    },
+                    ExpiresIn=settings.PRESIGNED_URL_EXPIRE_SECONDS,
+                ),
+            }
+            for part_number in range(1, part_count + 1)
+        ]
+
+        return {
+            "key": file_key,
+            "method": "MULTIPART",
+            "upload_id": upload_id,
+            "parts": parts,
+        }
+
+    except Exception as e:
+        logger.error("S3 Multipart Presign Error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"S3 multipart presign failed: {str(e)}"
+        )
+
+
+def complete_multipart_upload(file_key: str, upload_id: str, parts: list):
+    """Completes a client-driven multipart upload from (part_number, etag) pairs."""
+    from botocore.exceptions import ClientError
+
+    check_s3_connection()
+
+    try:
+        aws_client.s3.complete_multipart_upload(
+            Bucket=settings.S3_BUCKET,
+            Key=file_key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                    for part in sorted(parts, key=lambda p: p["part_number"])
+                ]
+            },
+        )
+    except ClientError as e:
+        logger.warning("S3 multipart completion rejected for %s: %s", file_key, e)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Could not complete multipart upload: {str(e)}"
+        )
+    except Exception as e:
+        logger.error("S3 Multipart Complete Error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"S3 multipart completion failed: {str(e)}"
+        )
+
+
+def head_s3_object(file_key: str):
+    """Returns the object's HEAD metadata, or None if it does not exist."""
+    from botocore.exceptions import ClientError
+
+    check_s3_connection()
+
+    try:
+        return aws_client.s3.head_object(Bucket=settings.S3_BUCKET, Key=file_key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        logger.error("S3 Head Error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"S3 head failed: {str(e)}"
+        )
+    except Exception as e:
+        logger.error("S3 Head Error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"S3 head failed: {str(e)}"
+        )
+
+
+S3_DELETE_BATCH_SIZE = 1000  # DeleteObjects accepts at most 1000 keys
+
+
+def delete_many_from_s3(file_keys: list) -> dict:
+    """
+    Deletes objects in DeleteObjects batches of up to 1000 keys.
+    Returns {key: error message} for every key that could not be deleted.
+    """
+    check_s3_connection()
+    failed = {}
+
+    for start in range(0, len(file_keys), S3_DELETE_BATCH_SIZE):
+        batch = file_keys[start:start + S3_DELETE_BATCH_SIZE]
+        try:
+            response = aws_client.s3.delete_objects(
+                Bucket=settings.S3_BUCKET,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            for error in response.get("Errors", []):
+                failed[error["Key"]] = error.get("Message", error.get("Code", "Delete failed"))
+        except Exception as e:
+            logger.error("S3 Batch Delete Error: %s", e)
+            for key in batch:
+                failed[key] = str(e)
+
+    return failed
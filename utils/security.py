@@ -1,18 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
 import secrets
 import string
+import hashlib
+import hmac
+import time
+import asyncio
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds tracks the configured cost so older, cheaper hashes are
+# reported by verify_and_update and upgraded on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool (bcrypt releases the
+    GIL) so hashing never blocks the event loop. When more than max_pending
+    operations are queued or running, new ones are rejected with 503.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_pending: int):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.busy_seconds = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), fn, *args
+            )
+        finally:
+            self._pending -= 1
+            self.completed += 1
+            self.busy_seconds += time.perf_counter() - start
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        """Returns (valid, new_hash); new_hash is set when the cost has changed."""
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "busy_seconds": self.busy_seconds,
+        }
+
+
+password_hasher = PasswordHasher(
+    pwd_context, settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING
+)
+
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.verify(plain_password, hashed_password)
+
+async def verify_and_update_password(plain_password, hashed_password):
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -27,3 +120,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 def generate_otp(length: int = 6) -> str:
     """Generate a random numeric OTP."""
     return ''.join(secrets.choice(string.digits) for _ in range(length))
+
+def hash_otp(email: str, otp: str) -> str:
+    """Keyed hash of an OTP, bound to the account it was issued for."""
+    message = f"{email.lower()}:{otp}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+def otp_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(minutes=settings.OTP_EXPIRE_MINUTES)